@@ -1,26 +1,59 @@
 import requests
-from requests.auth import HTTPBasicAuth
 import json
 import configparser
-import re
+import os
 import sys
+import threading
+import time
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from monitor import BambooBuildMonitor
+from http_client import get_session, configure_backend, load_http_settings, close_sessions
+from concurrency import backend_slot, load_concurrency_limits, raise_if_cancelled
+from ttl_cache import TTLCache
+from branch_index import BAMBOO_REST_URL, get_branch_index, clear_branch_indexes
+from log_scanner import scan_log
+from sonar_report import build_sonar_reports, load_sonar_settings
+from image_processing import optimize_images, load_image_settings
+from run_journal import load_journal
+from poll_state import PollState, load_daemon_settings, jira_minute, parse_jira_datetime
+from webhook import WebhookListener, load_webhook_settings
+from adf_links import AdfLinkExtractor
 from requests.exceptions import RequestException
 from utils import capture_screenshots_with_cookies
 from utils import kill_edge_processes
 from upload_file import upload_files_to_jira
 import urllib.parse
-from notify import show_notification
+from notify import show_notification, configure_notifications, get_dispatcher
 
-# Consulta JQL
 URL_PATTERN_BITBUCKET = r'https://bitbucket\.org/[^\s"\'{}]+'
 URL_PATTERN_BAMBOO = r'http://bamboo\.afphabitat\.net:8085/[^\s"\'{}]+'
 
+# Extractor de URLs de los campos de pauta (ADF): texto, enlaces y tarjetas en una sola pasada
+PAUTA_LINKS = AdfLinkExtractor({'bitbucket': URL_PATTERN_BITBUCKET, 'bamboo': URL_PATTERN_BAMBOO})
+
+# Consulta JQL: issues pendientes de revisión QAT
 JQL_QUERY = 'status in ("Por Hacer QAT","Por Hacer QAT PROD","Por Revisar QAT") ' \
             'and project not in ("Proyecto para Pruebas y Capacitacion")'
 
-JQL_QUERY = 'issue in('+ sys.argv[1] +')'
+# Caché de shortName por plan Bamboo: en memoria durante la ejecución y en disco entre ejecuciones
+PLAN_CACHE = TTLCache(path='.cache/bamboo_plans.json', ttl=7 * 24 * 3600, max_entries=500)
+
+# Segundos que se espera a que los issues en curso se detengan tras una interrupción
+CANCEL_TIMEOUT = 30
+
+# Jobs de Bamboo que ejecutan el análisis Sonar; están en etapas manuales del plan
+SONAR_JOBS = ('SON', 'AN')
+
+# Campos de Jira que usa el pipeline: se piden una sola vez en la búsqueda
+# (proyección con fields=) para no volver a consultar cada issue.
+ISSUE_FIELDS = [
+    'summary',
+    'updated',
+    'subtasks',
+    'customfield_10064',  # Pull requests de la pauta
+    'customfield_10084'   # Planes Bamboo de la pauta
+]
 
 
 def load_config(config_file='config.ini'):
@@ -42,36 +75,101 @@ def load_config(config_file='config.ini'):
     return jira_url, jira_token, jira_email, bitbucket_token, bamboo_user, bamboo_password, edge_driver_path, edge_user_data_dir, edge_profile_directory
 
 
-def search_issues(jira_url, jira_token, jira_email):
-    """Realiza la consulta JQL y devuelve una lista de issues."""
+def configure_sessions(jira_token, jira_email, bitbucket_token, bamboo_user, bamboo_password):
+    """Crea las sesiones keep-alive compartidas de cada backend con sus credenciales."""
+    load_http_settings()
+    configure_backend('jira', auth=(jira_email, jira_token))
+    configure_backend('bitbucket', headers={"Authorization": f"Bearer {bitbucket_token}"})
+    configure_backend('bamboo', auth=(bamboo_user, bamboo_password))
+    configure_backend('sonar')
+
+
+def _next_page_params(params, data):
+    """
+    Calcula los parámetros de la siguiente página de una búsqueda JQL, o None si no hay más.
+
+    Soporta la paginación clásica (startAt/total) y la basada en nextPageToken.
+    """
+    issues = data.get('issues', [])
+    next_token = data.get('nextPageToken')
+
+    if next_token and not data.get('isLast', False):
+        return dict(params, nextPageToken=next_token)
+
+    if 'total' in data and issues:
+        next_start = data.get('startAt', params.get('startAt', 0)) + len(issues)
+        if next_start < data['total']:
+            return dict(params, startAt=next_start)
+
+    return None
+
+def iter_issues(jira_url, jira_token, jira_email, jql=None, page_size=100, validate_query=None, raise_errors=False):
+    """
+    Recorre todas las páginas de la consulta JQL y entrega los issues a medida que llegan.
+
+    Mientras se procesa una página, la siguiente se descarga en segundo plano, de modo
+    que solo hay como máximo dos páginas en memoria.
+
+    :param jql: Consulta JQL, por defecto JQL_QUERY.
+    :param page_size: Número de issues por página (maxResults).
+    :param validate_query: Valor de validateQuery; con "warn" Jira omite las claves
+        inexistentes de "issue in (...)" en lugar de rechazar toda la consulta.
+    :param raise_errors: Propagar los errores de la búsqueda en lugar de solo informarlos,
+        para que quien llama distinga una consulta incompleta de una sin resultados.
+    """
     headers = {
         "Accept": "application/json",
         "Content-Type": "application/json"
     }
     
     params = {
-        "jql": JQL_QUERY,
-        "maxResults": 100  # Limita el número de resultados por petición
+        "jql": jql or JQL_QUERY,
+        "maxResults": page_size,  # Limita el número de resultados por petición
+        "fields": ','.join(ISSUE_FIELDS)  # Solo los campos que usa el pipeline
     }
+    if validate_query:
+        params["validateQuery"] = validate_query
 
-    try:
-        response = requests.get(
+    session = get_session('jira', auth=(jira_email, jira_token))
+
+    def fetch_page(page_params):
+        response = session.get(
             f"{jira_url}/search",
             headers=headers,
-            params=params,
-            auth=HTTPBasicAuth(jira_email, jira_token)
+            params=page_params
         )
-
         response.raise_for_status()
+        return response.json()
 
-        return response.json().get('issues', [])
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        future = prefetcher.submit(fetch_page, params)
+        while future is not None:
+            try:
+                data = future.result()
+            except requests.exceptions.HTTPError as http_err:
+                if raise_errors:
+                    raise
+                print(f"HTTP error occurred: {http_err}")
+                return
+            except Exception as err:
+                if raise_errors:
+                    raise
+                print(f"An error occurred: {err}")
+                return
+
+            for warning in data.get('warningMessages', []):
+                print(f"Advertencia de Jira: {warning}")
+
+            # Pedir la siguiente página antes de entregar la actual
+            params = _next_page_params(params, data)
+            future = prefetcher.submit(fetch_page, params) if params else None
+
+            for issue in data.get('issues', []):
+                yield issue
 
-    except requests.exceptions.HTTPError as http_err:
-        print(f"HTTP error occurred: {http_err}")
-    except Exception as err:
-        print(f"An error occurred: {err}")
-    
-    return []
+def search_issues(jira_url, jira_token, jira_email):
+    """Realiza la consulta JQL y devuelve una lista con los issues de todas las páginas."""
+    return list(iter_issues(jira_url, jira_token, jira_email))
 
 def transition_issue(issue_key, jira_url, jira_token, jira_email):
     """Cambia el estado de un issue utilizando la transición especificada."""
@@ -87,11 +185,13 @@ def transition_issue(issue_key, jira_url, jira_token, jira_email):
             }
         }
         try:
-            response = requests.post(
+            session = get_session('jira', auth=(jira_email, jira_token))
+            # Un 429/503 significa que Jira no aplicó la transición: es seguro reintentarla
+            response = session.post(
                 f"{jira_url}/issue/{issue_key}/transitions",
                 headers=headers,
                 data=json.dumps(data),
-                auth=HTTPBasicAuth(jira_email, jira_token)
+                retry_on_reject=True
             )
 
             response.raise_for_status()
@@ -108,26 +208,6 @@ def transition_issue(issue_key, jira_url, jira_token, jira_email):
         attempt_transition("641")
 
 
-# Función para limpiar y eliminar URLs duplicadas
-def clean_and_remove_duplicates(urls, url_pattern):
-    # Expresión regular para encontrar URLs válidas
-    
-    seen_urls = set()
-    cleaned_urls = []
-
-    for url in urls:
-        # Buscar y limpiar la URL
-        match = re.search(url_pattern, url)
-
-        if match:
-            url = match.group()
-            # Añadir a la lista solo si no está ya en el conjunto de URLs vistas
-            if url not in seen_urls:
-                seen_urls.add(url)
-                cleaned_urls.append(url)
-    
-    return cleaned_urls
-
 def transform_pr_to_api(list_url):
     new_list = []
     for api_url in list_url:
@@ -136,47 +216,71 @@ def transform_pr_to_api(list_url):
         new_list.append(url_api)
     return new_list
 
-def get_url_plan_bamboo(issue_key, jira_url, jira_token, jira_email):
-    """Lista todos las url de los planes bamboo para analisar y automatizar la revision de una pauta."""
+def fetch_issue(issue_key, jira_url, jira_token, jira_email, fields=None):
+    """Obtiene un issue pidiendo solo los campos indicados (por defecto ISSUE_FIELDS)."""
     headers = {
         "Accept": "application/json",
         "Content-Type": "application/json"
     }
+    params = {
+        "fields": ','.join(fields or ISSUE_FIELDS)
+    }
+
+    session = get_session('jira', auth=(jira_email, jira_token))
+    response = session.get(
+        f"{jira_url}/issue/{issue_key}",
+        headers=headers,
+        params=params
+    )
+    response.raise_for_status()
+    return response.json()
+
+def extract_url_plan_bamboo(issue):
+    """Extrae las url de los planes bamboo del campo de pauta de un issue ya obtenido."""
+    cleaned_urls = PAUTA_LINKS.extract(issue.get('fields', {}).get('customfield_10084'))['bamboo']
+    # Imprimir URLs limpias y únicas
+    for url in cleaned_urls:
+        print(url)
+
+    return cleaned_urls
+
+def extract_pull_request_paths(issue):
+    """Extrae los pull request del campo de pauta de un issue ya obtenido."""
+    cleaned_urls = PAUTA_LINKS.extract(issue.get('fields', {}).get('customfield_10064'))['bitbucket']
+    # Imprimir URLs limpias y únicas
+    for url in cleaned_urls:
+        print(url)
+
+    return cleaned_urls
+
+def extract_subtasks(issue):
+    """Devuelve las subtareas de un issue ya obtenido que están en el estado a procesar."""
+    issue_key = issue.get('key')
+    subtasks = issue.get('fields', {}).get('subtasks', [])
+
+    matching_subtasks = []
+
+    if subtasks:
+        print(f"Se encontraron {len(subtasks)} subtareas para el issue {issue_key}:")
+        for subtask in subtasks:
+            key = subtask.get('key')
+            summary = subtask.get('fields', {}).get('summary')
+            status_id = subtask.get('fields', {}).get('status', {}).get('id')
+
+            if status_id == "10047":
+                status_name = subtask.get('fields', {}).get('status', {}).get('name')
+                print(f"-A procesar {key}: {summary} {status_name}")
+                matching_subtasks.append(key)
+    else:
+        print(f"No se encontraron subtareas para el issue {issue_key}.")
+    
+    return matching_subtasks
+
+def get_url_plan_bamboo(issue_key, jira_url, jira_token, jira_email):
+    """Lista todos las url de los planes bamboo para analisar y automatizar la revision de una pauta."""
     try:
-        response = requests.get(
-            f"{jira_url}/issue/{issue_key}",
-            headers=headers,
-            auth=HTTPBasicAuth(jira_email, jira_token)
-        )
-        response.raise_for_status()
-        json_data = response.json().get('fields', {}).get('customfield_10084')
-        texts = []
-        def extract_text(content):
-            """Función recursiva para extraer texto de la estructura JSON"""
-            if isinstance(content, dict):
-                if content.get('type') == 'text':
-                    texts.append(content.get('text', ''))
-                for value in content.values():
-                    extract_text(value)
-            elif isinstance(content, list):
-                for item in content:
-                    extract_text(item)
-        
-        extract_text(json_data)
-        json_text = ' '.join(texts)
-        json_text = json_text.replace('\n', ' ')
-        json_text = json_text.replace('\r', ' ')
-        json_text = ' '.join(json_text.split())  # Limpia espacios redundantes
-
-        #print(json_text)
-        # Buscar todas las URLs en el texto
-        urls = re.findall(URL_PATTERN_BAMBOO, json_text)
-        cleaned_urls = clean_and_remove_duplicates(urls, URL_PATTERN_BAMBOO)
-        # Imprimir URLs limpias y únicas
-        for url in cleaned_urls:
-            print(url)
-
-        return cleaned_urls
+        issue = fetch_issue(issue_key, jira_url, jira_token, jira_email, fields=['customfield_10084'])
+        return extract_url_plan_bamboo(issue)
     except requests.exceptions.HTTPError as http_err:
         print(f"HTTP error occurred: {http_err}")
     except Exception as err:
@@ -184,27 +288,9 @@ def get_url_plan_bamboo(issue_key, jira_url, jira_token, jira_email):
 
 def get_pull_request_paths(issue_key, jira_url, jira_token, jira_email):
     """Lista todos los pull request para analisar y automatizar la revision de una pauta."""
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json"
-    }
     try:
-        response = requests.get(
-            f"{jira_url}/issue/{issue_key}",
-            headers=headers,
-            auth=HTTPBasicAuth(jira_email, jira_token)
-        )
-        response.raise_for_status()
-        json_data = response.json().get('fields', {}).get('customfield_10064')
-        json_text = json.dumps(json_data)
-
-        urls = re.findall(URL_PATTERN_BITBUCKET, json_text)
-        cleaned_urls = clean_and_remove_duplicates(urls, URL_PATTERN_BITBUCKET)
-        # Imprimir URLs limpias y únicas
-        for url in cleaned_urls:
-            print(url)
-
-        return cleaned_urls
+        issue = fetch_issue(issue_key, jira_url, jira_token, jira_email, fields=['customfield_10064'])
+        return extract_pull_request_paths(issue)
     except requests.exceptions.HTTPError as http_err:
         print(f"HTTP error occurred: {http_err}")
     except Exception as err:
@@ -213,40 +299,9 @@ def get_pull_request_paths(issue_key, jira_url, jira_token, jira_email):
 
 def list_subtasks(issue_key, jira_url, jira_token, jira_email):
     """Lista todas las subtareas asociadas a un issue principal."""
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json"
-    }
-
     try:
-        response = requests.get(
-            f"{jira_url}/issue/{issue_key}",
-            headers=headers,
-            auth=HTTPBasicAuth(jira_email, jira_token)
-        )
-
-        response.raise_for_status()
-
-        # Obtener las subtareas
-        subtasks = response.json().get('fields', {}).get('subtasks', [])
-
-        matching_subtasks = []
-
-        if subtasks:
-            print(f"Se encontraron {len(subtasks)} subtareas para el issue {issue_key}:")
-            for subtask in subtasks:
-                key = subtask.get('key')
-                summary = subtask.get('fields', {}).get('summary')
-                status_id = subtask.get('fields', {}).get('status', {}).get('id')
-
-                if status_id == "10047":
-                    paths = subtask.get('fields', {}).get('status', {}).get('name')
-                    print(f"-A procesar {key}: {summary} {status_name}")
-                    matching_subtasks.append(key)
-        else:
-            print(f"No se encontraron subtareas para el issue {issue_key}.")
-        
-        return matching_subtasks
+        issue = fetch_issue(issue_key, jira_url, jira_token, jira_email, fields=['subtasks'])
+        return extract_subtasks(issue)
 
     except requests.exceptions.HTTPError as http_err:
         print(f"HTTP error occurred: {http_err}")
@@ -277,75 +332,80 @@ def clasificar_componente(component):
         print(f"Error inesperado: {e}")
         return 'error'  # Manejar otros errores inesperados
 
-def get_info_pull_requests(url_pull_requests, bitbucket_token):
+def get_info_pull_request(session, url_pull_request, headers):
+    """Obtiene la información de un pull request; en caso de error devuelve una entrada con 'error'."""
+    try:
+        response = session.get(url_pull_request, headers=headers)
+        response.raise_for_status()  # Lanza un error para códigos de estado HTTP 4xx/5xx
+        
+        # Intenta obtener el JSON
+        try:
+            
+            component = url_pull_request.split('/')[6]
+            tipo = clasificar_componente(component)
+            pr_info = response.json()
+            source_branch = pr_info['source']['branch']['name']
+            # Commit de cabeza de la rama origen, para reutilizar builds que ya lo compilaron
+            source_commit = (pr_info['source'].get('commit') or {}).get('hash')
+            state = pr_info['state']
+            return {
+                'url_pull_request': url_pull_request,
+                'source_branch': source_branch,
+                'source_commit': source_commit,
+                'state': state,
+                'tipo': tipo,
+                'component': component
+            }
+        except requests.exceptions.JSONDecodeError:
+            return {
+                'url_pull_request': url_pull_request,
+                'error': 'Error al decodificar la respuesta JSON.'
+            }
+    
+    except requests.exceptions.HTTPError as http_err:
+        return {
+            'url_pull_request': url_pull_request,
+            'error': f'Error HTTP: {http_err}'
+        }
+    except requests.exceptions.RequestException as req_err:
+        return {
+            'url_pull_request': url_pull_request,
+            'error': f'Error en la solicitud: {req_err}'
+        }
+
+def get_info_pull_requests(url_pull_requests, bitbucket_token, max_workers=8):
+    """
+    Obtiene en paralelo la información de varios pull requests de Bitbucket.
+
+    :param url_pull_requests: URLs de la API de Bitbucket de cada pull request.
+    :param bitbucket_token: Token de acceso a Bitbucket.
+    :param max_workers: Número máximo de peticiones simultáneas.
+    :return: Lista de resultados en el mismo orden que url_pull_requests.
+    """
     headers = {
         "Accept": "application/json",
         "Authorization": f"Bearer {bitbucket_token}"
     }
     
-    results = []
-    
-    for url_pull_request in url_pull_requests:
-        try:
-            response = requests.get(url_pull_request, headers=headers)
-            response.raise_for_status()  # Lanza un error para códigos de estado HTTP 4xx/5xx
-            
-            # Intenta obtener el JSON
-            try:
-                
-                component = url_pull_request.split('/')[6]
-                tipo = clasificar_componente(component)
-                pr_info = response.json()
-                source_branch = pr_info['source']['branch']['name']
-                state = pr_info['state']
-                results.append({
-                    'url_pull_request': url_pull_request,
-                    'source_branch': source_branch,
-                    'state': state,
-                    'tipo': tipo,
-                    'component': component
-                })
-            except requests.exceptions.JSONDecodeError:
-                results.append({
-                    'url_pull_request': url_pull_request,
-                    'error': 'Error al decodificar la respuesta JSON.'
-                })
-        
-        except requests.exceptions.HTTPError as http_err:
-            results.append({
-                'url_pull_request': url_pull_request,
-                'error': f'Error HTTP: {http_err}'
-            })
-        except requests.exceptions.RequestException as req_err:
-            results.append({
-                'url_pull_request': url_pull_request,
-                'error': f'Error en la solicitud: {req_err}'
-            })
+    if not url_pull_requests:
+        return []
+
+    session = get_session('bitbucket', headers=headers)
+
+    workers = min(max_workers, len(url_pull_requests))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # map conserva el orden de entrada
+        results = list(executor.map(lambda url: get_info_pull_request(session, url, headers), url_pull_requests))
     
     return results
 
-def get_url_bamboo_rama_origen(plan_key, branch_name):
+def get_url_bamboo_rama_origen(plan_key, branch_name, bamboo_user=None, bamboo_password=None):
     #http://bamboo.afphabitat.net:8085/browse/WL12CRT-OSDQA
 
-    url = f"http://bamboo.afphabitat.net:8085/rest/api/latest/plan/{plan_key}/branch"
-    
-    # Hacemos la solicitud HTTP GET
-    response = requests.get(url)
-    
-    if response.status_code != 200:
-        raise Exception(f"Error al obtener los datos de Bamboo: {response.status_code}")
-    
-    # Parseamos el XML de la respuesta
-    root = ET.fromstring(response.content)
-    
-    # Iteramos sobre los elementos <branch> para encontrar el que coincide con el shortName
-    for branch in root.findall(".//branch"):
-        short_name = branch.get('shortName')
-        if short_name == branch_name:
-            # Obtenemos el valor del atributo href dentro del elemento <link>
-            link_element = branch.find(".//link[@rel='self']")
-            if link_element is not None:
-                return link_element.get('href')
+    # Buscamos la rama por shortName en el índice del plan (se descarga una sola vez)
+    branch = get_branch_index(plan_key, bamboo_user, bamboo_password).get(branch_name)
+    if branch is not None:
+        return branch['link']
     
     return None
 
@@ -354,11 +414,18 @@ def get_url_bamboo_rama_origen(plan_key, branch_name):
 def extraer_short_name(plan_key, bamboo_user, bamboo_password):
     """
     Extrae el shortName de un plan Bamboo a partir de datos XML.
+
+    Los nombres se guardan en PLAN_CACHE, así que un plan ya resuelto no vuelve a consultarse
+    hasta que expire su entrada o se invalide la caché (--refresh-plans).
     """
+    cached = PLAN_CACHE.get(plan_key)
+    if cached is not None:
+        return cached
+
     try:
-        response = requests.get(
-            f"http://bamboo.afphabitat.net:8085/rest/api/latest/plan/{plan_key}",
-            auth=HTTPBasicAuth(bamboo_user, bamboo_password)
+        session = get_session('bamboo', auth=(bamboo_user, bamboo_password))
+        response = session.get(
+            f"http://bamboo.afphabitat.net:8085/rest/api/latest/plan/{plan_key}"
             )
         response.raise_for_status()
 
@@ -374,6 +441,7 @@ def extraer_short_name(plan_key, bamboo_user, bamboo_password):
 
             # Verificar si shortName está presente
             if short_name:
+                PLAN_CACHE.set(plan_key, short_name)
                 return short_name
             else:
                 return 'shortName no encontrado'
@@ -391,38 +459,86 @@ def extraer_short_name(plan_key, bamboo_user, bamboo_password):
         print(f"An error occurred: {err}")
 
 def obtener_url_rama_bamboo(plan_key, branch_name, bamboo_user, bamboo_password):
-    url = f"http://bamboo.afphabitat.net:8085/rest/api/latest/plan/{plan_key}/branch"
-    
-    # Hacemos la solicitud HTTP GET
-    response = requests.get(url, auth=HTTPBasicAuth(bamboo_user, bamboo_password))
-    
-    if response.status_code != 200:
-        raise Exception(f"Error al obtener los datos de Bamboo: {response.status_code}")
-    
-    # Parseamos el XML de la respuesta
-    root = ET.fromstring(response.content)
-    
-    # Iteramos sobre los elementos <branch> para encontrar el que coincide con el shortName
-    for branch in root.findall(".//branch"):
-        short_name = branch.get('shortName')
-        #print(f'{short_name} {branch_name}')
-        if short_name == branch_name.replace('/','-'):
-            branch_key = branch.get('key')
-            if branch_key is not None:
-                return branch_key
-            # Obtenemos el valor del atributo href dentro del elemento <link>
-            #link_element = branch.find(".//link[@rel='self']")
-            #if link_element is not None:
-            #    return link_element.get('href')
+    # Buscamos la rama por shortName en el índice del plan (se descarga una sola vez)
+    branch = get_branch_index(plan_key, bamboo_user, bamboo_password).get(branch_name.replace('/','-'))
+    if branch is not None:
+        return branch['key']
     
     return None  
 
+def same_commit(revision, commit):
+    """Compara dos hashes de commit; Bitbucket entrega el hash abreviado y Bamboo el completo."""
+    if not revision or not commit or min(len(revision), len(commit)) < 7:
+        return False
+    return revision.startswith(commit) or commit.startswith(revision)
+
+def _sonar_jobs(result):
+    """
+    Jobs Sonar (SONAR_JOBS) de un resultado con sus etapas expandidas.
+
+    :return: Lista de (etapa manual, lifeCycleState del job).
+    """
+    jobs = []
+    for stage in (result.get('stages') or {}).get('stage', []):
+        for job in (stage.get('results') or {}).get('result', []):
+            # Clave del resultado de un job: PLAN-RAMA-JOB-numero
+            parts = (job.get('buildResultKey') or job.get('key') or '').split('-')
+            if len(parts) >= 2 and parts[-2] in SONAR_JOBS:
+                jobs.append((bool(stage.get('manual')), job.get('lifeCycleState')))
+    return jobs
+
+def sonar_evidence_available(result):
+    """
+    True si el resultado tiene o tendrá los logs de los jobs Sonar.
+
+    Un build automático del commit no ejecuta las etapas manuales (jobs Sonar) y aun así
+    termina como Successful; reutilizarlo dejaría al issue sin evidencia.
+    """
+    jobs = _sonar_jobs(result)
+    if not jobs:
+        return False
+    if result.get('lifeCycleState') in ('Queued', 'Pending', 'InProgress'):
+        # En curso: solo se ejecutarán si no dependen de una etapa manual
+        return not any(manual for manual, _ in jobs)
+    return not result.get('continuable') and all(state == 'Finished' for _, state in jobs)
+
+def find_existing_build(plan_key_branch, commit, bamboo_user, bamboo_password, max_results=10):
+    """
+    Busca entre los últimos resultados de un plan de rama un build del mismo commit que
+    terminó con éxito o que sigue en cola o ejecutándose, y que ejecutó (o ejecutará)
+    los jobs Sonar.
+
+    :param plan_key_branch: Clave del plan de la rama (por ejemplo, WL12CRT-WSDQA12).
+    :param commit: Hash del commit de cabeza del PR.
+    :param max_results: Resultados recientes a revisar.
+    :return: URL del resultado (.../rest/api/latest/result/PLAN-12), o None si hay que encolar uno nuevo.
+    """
+    params = {
+        "expand": "results.result.stages.stage.results.result",
+        "includeAllStates": "true",
+        "max-results": max_results
+    }
+    session = get_session('bamboo', auth=(bamboo_user, bamboo_password))
+    response = session.get(f"{BAMBOO_REST_URL}/result/{plan_key_branch}.json", params=params, headers={"Accept": "application/json"})
+    response.raise_for_status()
+
+    for result in response.json().get('results', {}).get('result', []):
+        if not same_commit(result.get('vcsRevisionKey'), commit):
+            continue
+        # Decide el build más reciente del commit; si falló se vuelve a ejecutar (puede ser un fallo intermitente)
+        if result.get('buildState') == 'Successful' or result.get('lifeCycleState') in ('Queued', 'Pending', 'InProgress'):
+            if sonar_evidence_available(result):
+                return f"{BAMBOO_REST_URL}/result/{result.get('buildResultKey')}"
+            print(f"El build {result.get('buildResultKey')} del commit no ejecutó los jobs Sonar; se encola uno nuevo")
+        return None
+    return None
+
 def ejecutar_plan_bamboo(plan_key, branch_name, bamboo_user, bamboo_password):
     #http://bamboo.afphabitat.net:8085/rest/api/latest/queue/WL12CRT-WSDQA0?executeAllStages=true&bamboo.branch=bugfix-migracion-2.0.0
     url = f"http://bamboo.afphabitat.net:8085/rest/api/latest/queue/{plan_key}?executeAllStages=true&bamboo.branch={branch_name.replace('/','-')}"
     
-    # Hacemos la solicitud HTTP GET
-    response = requests.post(url, auth=HTTPBasicAuth(bamboo_user, bamboo_password))
+    # Encolamos el build; solo se reintenta si Bamboo lo rechazó sin encolarlo (429/503)
+    response = get_session('bamboo', auth=(bamboo_user, bamboo_password)).post(url, retry_on_reject=True)
     
     if response.status_code != 200:
         raise Exception(f"Error al obtener los datos de Bamboo: {response.status_code}")
@@ -459,7 +575,7 @@ def main():
         # Cambiar el estado del primer issue encontrado
         first_issue_key = issues[0].get('key')
         transition_issue(first_issue_key, jira_url, jira_token, jira_email)  
-        list_subtasks_por_hacer = list_subtasks(first_issue_key, jira_url, jira_token, jira_email)
+        list_subtasks_por_hacer = extract_subtasks(issues[0])
         
     else:
         print("No se encontraron issues que coincidan con la consulta JQL.")
@@ -475,30 +591,50 @@ def print_bamboo_url_states(build_states):
         n_url = url.split('/')
         print(f"http://bamboo.afphabitat.net:8085/browse/{n_url[7]}")
 
-def get_sonar_urls(results_plan, bamboo_user, bamboo_password):
-    sonar_base_url="http://sonar.afphabitat.net:9000/dashboard"
-    sonar_urls = []
+def get_sonar_log_urls(results_plan):
+    """Arma la lista de (url_log, resultado) de los jobs Sonar (SON y AN) de cada resultado."""
+    log_urls = []
     for result in results_plan:
         n_url = result.split('/')
         result = n_url[7]
         descript = result.split('-')
         codi = f'{descript[0]}-{descript[1]}'
         num = f'{descript[2]}'
-        jobs = ['SON', 'AN']
-        for job in jobs:
+        for job in SONAR_JOBS:
             url = f'http://bamboo.afphabitat.net:8085/download/{codi}-{job}/build_logs/{codi}-{job}-{num}.log'
-            try:
-                response = requests.get(url, auth=HTTPBasicAuth(bamboo_user, bamboo_password))
-                if response.status_code == 200:
-                    # Buscar las URLs que comienzan con la base de Sonar
-                    sonar_urls_in_log = re.findall(rf"{re.escape(sonar_base_url)}\S+", response.text)
-                    
-                    # Agregar las URLs encontradas a la lista general
-                    sonar_urls.extend(sonar_urls_in_log)
-                else:
-                    print(f"No se encontro job sonar para el resultado {url} correspondiente a la ejecion {result}")
-            except RequestException as e:
-                print(f"Excepción durante la solicitud HTTP para {url}: {e}")
+            log_urls.append((url, result))
+    return log_urls
+
+def get_sonar_urls(results_plan, bamboo_user, bamboo_password, max_workers=8):
+    """
+    Busca la URL del dashboard Sonar en los logs de los jobs Sonar de cada resultado.
+
+    Los logs se descargan en paralelo y en streaming: cada uno se lee por bloques y la
+    descarga se corta al encontrar la URL, sin cargar el log completo en memoria.
+    """
+    log_urls = get_sonar_log_urls(results_plan)
+    if not log_urls:
+        return []
+
+    session = get_session('bamboo', auth=(bamboo_user, bamboo_password))
+
+    def scan(log_url):
+        url, result = log_url
+        try:
+            sonar_urls_in_log = scan_log(session, url)
+            if sonar_urls_in_log is None:
+                print(f"No se encontro job sonar para el resultado {url} correspondiente a la ejecion {result}")
+                return []
+            return sonar_urls_in_log
+        except RequestException as e:
+            print(f"Excepción durante la solicitud HTTP para {url}: {e}")
+            return []
+
+    sonar_urls = []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(log_urls))) as executor:
+        # map conserva el orden resultado/job
+        for sonar_urls_in_log in executor.map(scan, log_urls):
+            sonar_urls.extend(sonar_urls_in_log)
     return sonar_urls
 
 def print_sonar_url(sonar_urls):
@@ -514,20 +650,12 @@ def is_branch_enabled(bamboo_user, bamboo_password, plan_key, branch_name):
         :return: True si la rama está habilitada, False en caso contrario.
         """
         try:
-            # URL para obtener las ramas de un plan
-            url = f"http://bamboo.afphabitat.net:8085/rest/api/latest/plan/{plan_key}/branch.json"
-            response = requests.get(url, auth=HTTPBasicAuth(bamboo_user, bamboo_password))
-            response.raise_for_status()
-
-            branches_info = response.json()
-
-            # Recorremos las ramas y verificamos si el nombre coincide
+            # Buscamos la rama por shortName en el índice del plan (se descarga una sola vez)
             branch_name = branch_name.replace('/','-')
-            for branch in branches_info['branches']['branch']:
-                #print(f'{branch['shortName']} == {branch_name}')
-                if branch['shortName'] == branch_name:
-                    print(f"Rama '{branch_name}' encontrada en el plan '{plan_key}'.")
-                    return branch['enabled']
+            branch = get_branch_index(plan_key, bamboo_user, bamboo_password).get(branch_name)
+            if branch is not None:
+                print(f"Rama '{branch_name}' encontrada en el plan '{plan_key}'.")
+                return branch['enabled']
 
             print(f"Rama '{branch_name}' no encontrada en el plan '{plan_key}'.")
             return False  # Si no se encuentra la rama, consideramos que no está habilitada.
@@ -551,11 +679,21 @@ def enable_branch(bamboo_user, bamboo_password, plan_key, branch_name):
             url = f"http://bamboo.afphabitat.net:8085/rest/api/latest/plan/{plan_key}/branch/{branch}?vcsBranch={branch_name}"
 
 
-            response = requests.put(url, auth=HTTPBasicAuth(bamboo_user, bamboo_password))
+            response = get_session('bamboo', auth=(bamboo_user, bamboo_password)).put(url, headers={"Accept": "application/json"})
             response.raise_for_status()
 
             if response.status_code == 200:
                 print(f"Rama '{branch_name}' habilitada exitosamente en el plan '{plan_key}'.")
+                # Actualizar el índice de ramas con la rama creada, sin volver a descargarlo
+                index = get_branch_index(plan_key, bamboo_user, bamboo_password)
+                try:
+                    created = response.json()
+                except ValueError:
+                    created = {}
+                if created.get('key'):
+                    index.update(branch, key=created['key'], enabled=created.get('enabled', True), link=created.get('link', {}).get('href'))
+                else:
+                    index.refresh()
                 return True
             else:
                 print(f"Error al habilitar la rama '{branch_name}' en el plan '{plan_key}'. Código de estado: {response.status_code}")
@@ -579,79 +717,619 @@ def validate_branch(bamboo_user, bamboo_password, plan_key, source_branch):
     else:
         print(f"La rama '{source_branch}' ya está habilitada.")    
 
-def main_test():
-    """Función principal para buscar issues y cambiar el estado del primero encontrado."""
-    jira_url, jira_token, jira_email, bitbucket_token, bamboo_user, bamboo_password, edge_driver_path, edge_user_data_dir, edge_profile_directory = load_config()
-    
-    issues = search_issues(jira_url, jira_token, jira_email)
+def resolve_plans_by_component(urls_plan_bamboo, bamboo_user, bamboo_password, max_workers=8):
+    """
+    Resuelve en paralelo el shortName de cada plan de la pauta y los agrupa por componente.
 
-    if issues:
-        for issue in issues:
-            key = issue.get('key')
-            pull_requests = get_pull_request_paths(key, jira_url, jira_token, jira_email)
+    :param urls_plan_bamboo: URLs de los planes Bamboo de la pauta.
+    :return: Diccionario lower(shortName) -> lista de plan_key.
+    """
+    plan_keys = [url_plan_bamboo.split('/')[4] for url_plan_bamboo in urls_plan_bamboo or []]
+    if not plan_keys:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(plan_keys))) as executor:
+        short_names = list(executor.map(lambda plan_key: extraer_short_name(plan_key, bamboo_user, bamboo_password), plan_keys))
+
+    plans_by_component = {}
+    for plan_key, short_name in zip(plan_keys, short_names):
+        if not short_name:
+            print(f"No se pudo resolver el shortName del plan {plan_key}")
+            continue
+        plan_keys_for_name = plans_by_component.setdefault(short_name.lower(), [])
+        if plan_key not in plan_keys_for_name:
+            plan_keys_for_name.append(plan_key)
+    return plans_by_component
+
+def report_component_matching(info_pull_requests, plans_by_component):
+    """Informa los componentes con PR abierto sin plan en la pauta y los planes sin PR asociado."""
+    components = set()
+    for info_pull_request in info_pull_requests:
+        if 'error' in info_pull_request:
+            continue
+        components.add(info_pull_request['component'].lower())
+        if info_pull_request['tipo'] in ('back', 'front') and info_pull_request['state'] == 'OPEN':
+            if info_pull_request['component'].lower() not in plans_by_component:
+                print(f"Componente sin plan Bamboo en la pauta: {info_pull_request['component']}")
+
+    for short_name, plan_keys in plans_by_component.items():
+        if short_name not in components:
+            print(f"Plan Bamboo sin pull request asociado: {short_name} ({', '.join(plan_keys)})")
+
+def load_browser_pool(edge_driver_path, edge_user_data_dir, edge_profile_directory, config_file='config.ini'):
+    """
+    Crea y abre el pool de navegadores si [edge] pool_size es mayor que 0.
+
+        [edge]
+        pool_size = 3
+        pool_max_pages = 50
+
+    :return: BrowserPool listo para usar, o None para capturar con un Edge nuevo por build.
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    pool_size = config.getint('edge', 'pool_size', fallback=0)
+    if pool_size <= 0:
+        return None
+
+    from browser_pool import BrowserPool, edge_driver_factory
+    factory = edge_driver_factory(edge_driver_path, edge_user_data_dir, edge_profile_directory)
+    max_pages = config.getint('edge', 'pool_max_pages', fallback=50)
+    if edge_user_data_dir:
+        # Un Edge abierto mantiene bloqueadas las cookies del perfil que el pool copia
+        kill_edge_processes()
+    return BrowserPool(factory, size=pool_size, max_pages=max_pages).start()
+
+def process_build_evidence(api_url, issue_key, jira_url, jira_token, jira_email, bamboo_user, bamboo_password, edge_driver_path, edge_user_data_dir, edge_profile_directory, browser_pool=None, evidence='screenshot', report_format='png', image_settings=None, journal=None, cancel_event=None):
+    """
+    Etapas posteriores a un build terminado: busca las URLs Sonar en sus logs, genera la
+    evidencia (capturas de pantalla o reporte desde la API de Sonar) y la adjunta al issue en Jira.
+
+    Con journal, cada etapa terminada queda registrada y no se repite al reanudar. Con
+    cancel_event, se abandona el build antes de la siguiente etapa si se canceló la ejecución.
+    """
+    stage = f"build:{api_url}"
+    if journal is not None and journal.get(issue_key, f"{stage}:uploaded") is not None:
+        print(f"Evidencias del build {api_url} ya adjuntadas, se omite")
+        return
+
+    raise_if_cancelled(cancel_event)
+    sonar_urls = journal.get(issue_key, f"{stage}:sonar") if journal is not None else None
+    if sonar_urls is None:
+        sonar_urls = get_sonar_urls([api_url], bamboo_user, bamboo_password)
+        if journal is not None:
+            journal.put(issue_key, f"{stage}:sonar", sonar_urls)
+    print_sonar_url(sonar_urls)
+    if not sonar_urls:
+        print(f"No se encontraron URLs Sonar para el build {api_url}")
+        return
+
+    # Evidencia ya generada en una ejecución anterior (si la carpeta sigue existiendo)
+    temp_dir = journal.get(issue_key, f"{stage}:evidence") if journal is not None else None
+    if temp_dir and not os.path.isdir(temp_dir):
+        temp_dir = None
+    if temp_dir is None:
+        raise_if_cancelled(cancel_event)
+        if evidence == 'report':
+            # Reporte desde la API web de Sonar, sin navegador
+            temp_dir = build_sonar_reports(sonar_urls, report_format)
+        elif browser_pool is not None:
+            # Navegadores ya abiertos y compartidos entre issues; el pool limita cuántos se usan a la vez
+            temp_dir = browser_pool.capture(sonar_urls)
+        else:
+            # kill_edge_processes cierra todos los Edge, por eso va dentro del mismo turno de navegador
+            with backend_slot('browser'):
+                kill_edge_processes()
+                temp_dir = capture_screenshots_with_cookies(edge_driver_path, edge_user_data_dir, edge_profile_directory, sonar_urls)
+        if temp_dir and image_settings:
+            # Recortar, reducir y recomprimir las imágenes antes de adjuntarlas
+            optimize_images(temp_dir, **image_settings)
+        if temp_dir and journal is not None:
+            journal.put(issue_key, f"{stage}:evidence", temp_dir)
+    if temp_dir:
+        raise_if_cancelled(cancel_event)
+        # Archivos adjuntados en intentos anteriores: solo se suben los que faltan
+        attached = journal.get(issue_key, f"{stage}:attached", []) if journal is not None else []
+        attached = attached + upload_files_to_jira(jira_url, issue_key, jira_email, jira_token, temp_dir, exclude=attached)
+        if journal is not None:
+            journal.put(issue_key, f"{stage}:attached", attached)
+        missing = [name for name in sorted(os.listdir(temp_dir))
+                   if os.path.isfile(os.path.join(temp_dir, name)) and name not in attached]
+        if missing:
+            # El issue queda con error: al reanudar o reintentar se suben solo los que faltan
+            raise Exception(f"No se adjuntaron {len(missing)} archivo(s) del build {api_url}: {', '.join(missing)}")
+        if journal is not None:
+            journal.put(issue_key, f"{stage}:uploaded", attached)
+
+def discard_stale_journal(journal, issue, own_account, jira_url, jira_token, jira_email):
+    """
+    Descarta las etapas guardadas de un issue que cambió desde que se registraron (por
+    ejemplo, con un PR o commit nuevo), para no repetir builds de una versión anterior.
+    Los cambios hechos por el propio pipeline (adjuntos, transiciones) no cuentan.
+
+    :param own_account: Identificadores de la cuenta del pipeline (fetch_own_account).
+    """
+    key = issue.get('key')
+    updated = issue.get('fields', {}).get('updated')
+    if not updated:
+        return
+    saved = journal.get(key, 'updated')
+    if saved is not None and saved != updated:
+        try:
+            _, only_own = only_own_changes_since(key, saved, own_account or set(), jira_url, jira_token, jira_email)
+        except (RequestException, ValueError, KeyError) as err:
+            print(f"No se pudieron revisar los cambios de {key}: {err}")
+            only_own = False
+        if not only_own:
+            print(f"{key} cambió desde la ejecución anterior; se descartan sus etapas guardadas")
+            journal.clear(key)
+    journal.put(key, 'updated', updated)
+
+def process_issue(issue, jira_url, jira_token, jira_email, bitbucket_token, bamboo_user, bamboo_password, edge_driver_path, edge_user_data_dir, edge_profile_directory, browser_pool=None, evidence='screenshot', report_format='png', image_settings=None, journal=None, cancel_event=None, own_account=None):
+    """
+    Ejecuta la revisión completa de un issue: PRs, ramas y builds Bamboo, URLs Sonar,
+    capturas y subida de evidencias a Jira.
+
+    Con journal (RunJournal), una ejecución interrumpida se reanuda: se saltan las etapas
+    ya terminadas y los builds que quedaron encolados se vuelven a vigilar sin encolarlos
+    de nuevo. Al terminar el issue se borran sus entradas de la bitácora.
+
+    Con cancel_event (threading.Event), el issue se abandona entre etapas en cuanto se
+    activa; las etapas ya terminadas quedan registradas para reanudar.
+
+    Si el issue cambió desde que se registraron sus etapas (otra persona lo editó), estas
+    se descartan y la revisión parte de cero (ver discard_stale_journal).
+    """
+    key = issue.get('key')
+    if journal is not None:
+        discard_stale_journal(journal, issue, own_account, jira_url, jira_token, jira_email)
+    queued_build_list = journal.get(key, 'builds') if journal is not None else None
+    if queued_build_list is not None:
+        print(f"Reanudando {key}: {len(queued_build_list)} build(s) ya encolados")
+    else:
+        queued_build_list = queue_issue_builds(issue, bitbucket_token, bamboo_user, bamboo_password, journal, cancel_event)
+
+    monitor = BambooBuildMonitor(api_urls=queued_build_list, bamboo_user=bamboo_user, bamboo_passowrd=bamboo_password, cancel_event=cancel_event)
+    monitor.start_monitoring()
+
+    # Cada build pasa a Sonar, capturas y subida apenas termina, mientras los demás siguen corriendo
+    with ThreadPoolExecutor(max_workers=max(1, len(monitor.build_states))) as post_build_executor:
+        post_build_futures = []
+        for api_url, build_state in monitor.as_completed():
+            print(f"Build finalizado {api_url}: {build_state}")
+            if build_state in ('Successful', 'Failed'):
+                post_build_futures.append(post_build_executor.submit(
+                    process_build_evidence, api_url, key, jira_url, jira_token, jira_email, bamboo_user, bamboo_password, edge_driver_path, edge_user_data_dir, edge_profile_directory, browser_pool, evidence, report_format, image_settings, journal, cancel_event))
+        for future in post_build_futures:
+            future.result()
+
+    build_states = monitor.build_states
+    print_build_states(build_states=build_states)
+    print_bamboo_url_states(build_states=build_states)
+    if journal is not None:
+        journal.clear(key)
+    show_notification("Programa terminado exitosamente", "info")
+
+def queue_issue_builds(issue, bitbucket_token, bamboo_user, bamboo_password, journal=None, cancel_event=None):
+    """
+    Resuelve los PRs del issue, habilita las ramas en Bamboo y encola sus builds.
+
+    :return: URLs de los resultados de los builds encolados.
+    """
+    key = issue.get('key')
+    pipelines_back_list = journal.get(key, 'pipelines') if journal is not None else None
+    if pipelines_back_list is None:
+        info_pull_requests = journal.get(key, 'pull_requests') if journal is not None else None
+        if info_pull_requests is None:
+            # El issue ya viene con los campos de la pauta desde la búsqueda
+            pull_requests = extract_pull_request_paths(issue)
             api_prs = transform_pr_to_api(pull_requests)
             info_pull_requests = get_info_pull_requests(api_prs, bitbucket_token)
-            urls_plan_bamboo = get_url_plan_bamboo(key, jira_url, jira_token, jira_email)
-            pipelines_back_list = []
-            for info_pull_request in info_pull_requests:
-                url_pull_request = info_pull_request['url_pull_request']
-                source_branch = info_pull_request['source_branch']
-                tipo = info_pull_request['tipo']
-                state = info_pull_request['state']
-                component = info_pull_request['component']
-                print(f'{url_pull_request} {source_branch} {tipo} {state}')
-
-                if tipo == 'back' or tipo == 'front':
-                    if state == 'OPEN':
-                        for url_plan_bamboo in urls_plan_bamboo:
-                            plan_key = url_plan_bamboo.split('/')[4]
-                            plan_desde_pauta = extraer_short_name(plan_key, bamboo_user, bamboo_password)
-                            if plan_desde_pauta.lower() == component.lower():
-
-                                validate_branch(bamboo_user, bamboo_password, plan_key, source_branch)
-
-                                plan_key_branch = obtener_url_rama_bamboo(plan_key, source_branch, bamboo_user, bamboo_password)
-                                print(f"Añadiendo a lista de ejecucion: {component} {plan_key_branch}")
-                                pipelines_back_list.append({
-                                    'component': component,
-                                    'plan_key_branch': plan_key_branch,
-                                    'source_branch': source_branch,
-                                    'tipo': tipo
-                                })
-                    else:
-                        print(f"Se omite {component} ya que pull request se encuentra en estado merged")
-            queued_build_list = []
-            if len(pipelines_back_list) > 0:
-                for pipelines_back in pipelines_back_list:
-                    print(f'{pipelines_back['plan_key_branch']} {pipelines_back['source_branch']}')
-                    #
-                    queued_build = ejecutar_plan_bamboo(pipelines_back['plan_key_branch'], pipelines_back['source_branch'], bamboo_user, bamboo_password)
-                    queued_build_list.append(queued_build)
+            # Si algún PR falló no se registra, para volver a consultarlo al reanudar
+            if journal is not None and not any('error' in info for info in info_pull_requests):
+                journal.put(key, 'pull_requests', info_pull_requests)
+        pipelines_back_list = resolve_issue_pipelines(issue, info_pull_requests, bamboo_user, bamboo_password)
+        if journal is not None:
+            journal.put(key, 'pipelines', pipelines_back_list)
+
+    queued_build_list = []
+    if len(pipelines_back_list) > 0:
+        for pipelines_back in pipelines_back_list:
+            # No encolar más builds si se canceló la ejecución
+            raise_if_cancelled(cancel_event)
+            print(f"{pipelines_back['plan_key_branch']} {pipelines_back['source_branch']}")
+            # Un build ya encolado antes de una interrupción no se vuelve a encolar
+            stage = f"queued:{pipelines_back['plan_key_branch']}"
+            queued_build = journal.get(key, stage) if journal is not None else None
+            if queued_build is None:
+                queued_build = reuse_or_queue_build(pipelines_back, bamboo_user, bamboo_password)
+                if journal is not None and not queued_build.startswith('Error'):
+                    journal.put(key, stage, queued_build)
+            queued_build_list.append(queued_build)
+    else:
+        print("No hay planes back por ejecutar")
+        show_notification("No hay planes back por ejecutar.", "error")
+
+    if journal is not None:
+        journal.put(key, 'builds', queued_build_list)
+    return queued_build_list
+
+def reuse_or_queue_build(pipelines_back, bamboo_user, bamboo_password):
+    """
+    Devuelve la URL del resultado de un build del commit de cabeza del PR: uno existente
+    (exitoso o en curso, que el monitor vigila hasta terminar) o uno recién encolado.
+    """
+    plan_key_branch = pipelines_back['plan_key_branch']
+    commit = pipelines_back.get('source_commit')
+    if commit:
+        try:
+            existing_build = find_existing_build(plan_key_branch, commit, bamboo_user, bamboo_password)
+        except (RequestException, ValueError) as e:
+            print(f"No se pudieron consultar los builds de {plan_key_branch}, se encola uno nuevo: {e}")
+            existing_build = None
+        if existing_build is not None:
+            print(f"Reutilizando build del commit {commit}: {existing_build}")
+            return existing_build
+    return ejecutar_plan_bamboo(plan_key_branch, pipelines_back['source_branch'], bamboo_user, bamboo_password)
+
+def resolve_issue_pipelines(issue, info_pull_requests, bamboo_user, bamboo_password):
+    """
+    Valida (y habilita si hace falta) la rama de cada PR abierto en los planes de su componente.
+
+    :return: Lista de planes de rama a ejecutar.
+    """
+    urls_plan_bamboo = extract_url_plan_bamboo(issue)
+    # Planes de la pauta resueltos una sola vez: lower(shortName) -> [plan_key, ...]
+    plans_by_component = resolve_plans_by_component(urls_plan_bamboo, bamboo_user, bamboo_password)
+    report_component_matching(info_pull_requests, plans_by_component)
+    pipelines_back_list = []
+    for info_pull_request in info_pull_requests:
+        url_pull_request = info_pull_request['url_pull_request']
+        source_branch = info_pull_request['source_branch']
+        tipo = info_pull_request['tipo']
+        state = info_pull_request['state']
+        component = info_pull_request['component']
+        print(f'{url_pull_request} {source_branch} {tipo} {state}')
+
+        if tipo == 'back' or tipo == 'front':
+            if state == 'OPEN':
+                for plan_key in plans_by_component.get(component.lower(), []):
+                    validate_branch(bamboo_user, bamboo_password, plan_key, source_branch)
+
+                    plan_key_branch = obtener_url_rama_bamboo(plan_key, source_branch, bamboo_user, bamboo_password)
+                    print(f"Añadiendo a lista de ejecucion: {component} {plan_key_branch}")
+                    pipelines_back_list.append({
+                        'component': component,
+                        'plan_key_branch': plan_key_branch,
+                        'source_branch': source_branch,
+                        'source_commit': info_pull_request.get('source_commit'),
+                        'tipo': tipo
+                    })
             else:
-                print("No hay planes back por ejecutar")
-                show_notification("No hay planes back por ejecutar.", "error")
+                print(f"Se omite {component} ya que pull request se encuentra en estado merged")
+    return pipelines_back_list
+
+def open_pipeline():
+    """
+    Carga la configuración y prepara lo que comparten todos los issues: sesiones,
+    límites de concurrencia, pool de navegadores y bitácora.
+
+    :return: (config, workers, options) donde options son los argumentos con nombre de process_issue.
+    """
+    config = load_config()
+    jira_url, jira_token, jira_email, bitbucket_token, bamboo_user, bamboo_password, edge_driver_path, edge_user_data_dir, edge_profile_directory = config
+    configure_sessions(jira_token, jira_email, bitbucket_token, bamboo_user, bamboo_password)
+    workers = load_concurrency_limits()
+    clear_branch_indexes()
+    sonar_token, evidence, report_format = load_sonar_settings()
+    image_settings = load_image_settings()
+    configure_notifications()
+    journal = load_journal()
+    if '--reset-journal' in sys.argv and journal is not None:
+        journal.clear()
+    if sonar_token:
+        configure_backend('sonar', auth=(sonar_token, ''))
+    # El pool de navegadores solo hace falta si la evidencia son capturas de pantalla
+    browser_pool = None
+    if evidence != 'report':
+        browser_pool = load_browser_pool(edge_driver_path, edge_user_data_dir, edge_profile_directory)
+    options = {
+        'browser_pool': browser_pool,
+        'evidence': evidence,
+        'report_format': report_format,
+        'image_settings': image_settings,
+        'journal': journal,
+        # Se activa al interrumpir (Ctrl+C) para que los issues en curso terminen entre etapas
+        'cancel_event': threading.Event(),
+        # Cuenta de Jira del pipeline: sus propios cambios no invalidan la bitácora ni disparan revisiones
+        'own_account': fetch_own_account(jira_url, jira_token, jira_email)
+    }
+    return config, workers, options
 
-            monitor = BambooBuildMonitor(api_urls=queued_build_list, bamboo_user=bamboo_user, bamboo_passowrd=bamboo_password)
+def close_pipeline(options):
+    """
+    Cierra el pool de navegadores, la bitácora y las sesiones abiertas por open_pipeline.
+
+    Debe llamarse después de que process_issues terminó (o canceló y esperó) los issues en curso.
+    """
+    # Las notificaciones pendientes se envían en segundo plano; aquí solo se da un margen al salir
+    get_dispatcher().flush(timeout=10)
+    if options['browser_pool'] is not None:
+        options['browser_pool'].close()
+    if options['journal'] is not None:
+        options['journal'].close()
+    close_sessions()
+
+def process_issues(issues, config, workers, options, on_issue_done=None):
+    """
+    Procesa los issues a medida que llegan, hasta `workers` a la vez.
+
+    :param issues: Iterable de issues (por ejemplo, iter_issues).
+    :param on_issue_done: Función opcional (issue, error) llamada al terminar cada issue;
+        error es None si se procesó correctamente.
+    :return: Número de issues procesados.
+    """
+    processed = 0
+    pending = {}  # future -> issue
+    executor = ThreadPoolExecutor(max_workers=workers)
+    cancel_event = options.get('cancel_event')
+
+    def collect(futures):
+        for future in futures:
+            issue = pending.pop(future)
+            error = None
             try:
-                monitor.start_monitoring()
-                monitor.wait_for_completion()
-                build_states = monitor.build_states
-                print_build_states(build_states=build_states)
-                print_bamboo_url_states(build_states=build_states)
-                sonar_urls = get_sonar_urls(build_states, bamboo_user, bamboo_password)
-                print_sonar_url(sonar_urls)
-                kill_edge_processes()
-                temp_dir = capture_screenshots_with_cookies(edge_driver_path, edge_user_data_dir, edge_profile_directory, sonar_urls)
-                upload_files_to_jira(jira_url, key, jira_email, jira_token, temp_dir)
-                show_notification("Programa terminado exitosamente", "info")
-                    
-            except KeyboardInterrupt:
-                print("\nPrograma interrumpido manualmente. Cerrando...")
-            
+                future.result()
+            except Exception as err:
+                error = err
+                print(f"Error procesando el issue {issue.get('key')}: {err}")
+            if on_issue_done is not None:
+                on_issue_done(issue, error)
 
-    
-    else:
-        print("No se encontraron issues que coincidan con la consulta JQL.")
+    try:
+        # Los issues llegan página a página; no se cargan todos en memoria
+        for issue in issues:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            processed += 1
+            future = executor.submit(process_issue, issue, *config, **options)
+            pending[future] = issue
+
+            # No encolar más issues de los que pueden procesarse a la vez
+            if len(pending) >= workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        done, _ = wait(pending)
+        collect(done)
+    except KeyboardInterrupt:
+        cancel_issues(executor, pending, cancel_event)
+        raise
+    executor.shutdown()
+    return processed
+
+def cancel_issues(executor, pending, cancel_event, timeout=CANCEL_TIMEOUT):
+    """
+    Cancela los issues en curso: descarta los que no empezaron y pide a los que están
+    corriendo que se detengan entre etapas, esperando hasta `timeout` segundos a que lo hagan.
+    """
+    print("Cancelando los issues en curso...")
+    if cancel_event is not None:
+        cancel_event.set()
+    executor.shutdown(wait=False, cancel_futures=True)
+    _, not_done = wait(pending, timeout=timeout)
+    if not_done:
+        print(f"{len(not_done)} issue(s) no terminaron en {timeout} s: {', '.join(pending[future].get('key') for future in not_done)}")
+
+def main_test(jql=None):
+    """
+    Busca los issues de la consulta JQL y procesa cada uno, en paralelo si se configuran workers.
+
+    :param jql: Consulta JQL, por defecto JQL_QUERY.
+    """
+    config, workers, options = open_pipeline()
+    jira_url, jira_token, jira_email = config[:3]
+    try:
+        processed = process_issues(iter_issues(jira_url, jira_token, jira_email, jql=jql), config, workers, options)
+        if processed == 0:
+            print("No se encontraron issues que coincidan con la consulta JQL.")
+    except KeyboardInterrupt:
+        print("\nPrograma interrumpido manualmente. Cerrando...")
+    finally:
+        close_pipeline(options)
+
+def fetch_own_account(jira_url, jira_token, jira_email):
+    """Identificadores (accountId, correo, nombre) de la cuenta de Jira que usa el pipeline."""
+    identifiers = {jira_email}
+    try:
+        response = get_session('jira', auth=(jira_email, jira_token)).get(f"{jira_url}/myself")
+        response.raise_for_status()
+        account = response.json()
+        identifiers.update(account.get(field) for field in ('accountId', 'emailAddress', 'name', 'key'))
+    except (RequestException, ValueError) as err:
+        print(f"No se pudo consultar la cuenta de Jira del pipeline: {err}")
+    identifiers.discard(None)
+    return identifiers
+
+def only_own_changes_since(issue_key, since, own_account, jira_url, jira_token, jira_email):
+    """
+    Revisa los cambios de un issue posteriores a `since` (historial y comentarios).
+
+    :param since: Fecha updated de Jira desde la que se revisan los cambios.
+    :param own_account: Identificadores de la cuenta del pipeline (fetch_own_account).
+    :return: (updated actual, True si todos esos cambios los hizo la cuenta del pipeline)
+    """
+    headers = {"Accept": "application/json"}
+    params = {"fields": "updated,comment", "expand": "changelog"}
+    session = get_session('jira', auth=(jira_email, jira_token))
+    response = session.get(f"{jira_url}/issue/{issue_key}", headers=headers, params=params)
+    response.raise_for_status()
+    data = response.json()
+
+    since_time = parse_jira_datetime(since)
+    # El historial expandido trae los cambios más recientes; los comentarios no aparecen en él
+    changes = [(history.get('created'), history.get('author'))
+               for history in data.get('changelog', {}).get('histories', [])]
+    changes += [(comment.get('updated') or comment.get('created'), comment.get('updateAuthor') or comment.get('author'))
+                for comment in data.get('fields', {}).get('comment', {}).get('comments', [])]
+    for created, author in changes:
+        if not created or parse_jira_datetime(created) <= since_time:
+            continue
+        author = author or {}
+        if not {author.get('accountId'), author.get('emailAddress'), author.get('name')} & own_account:
+            return data['fields']['updated'], False
+    return data['fields']['updated'], True
+
+def run_daemon(jql=None):
+    """
+    Modo daemon: consulta periódicamente los issues de JQL_QUERY actualizados desde la
+    última consulta (marca de agua persistida) y procesa solo los nuevos o modificados.
+
+    Un issue ya procesado no se vuelve a procesar hasta que cambie de nuevo; los cambios
+    que hace el propio pipeline (adjuntos, transiciones) no cuentan. Los que fallan se
+    reintentan en la siguiente consulta.
+
+    :param jql: Consulta base, por defecto JQL_QUERY.
+    """
+    interval, state_path = load_daemon_settings()
+    state = PollState(state_path)
+    config, workers, options = open_pipeline()
+    jira_url, jira_token, jira_email = config[:3]
+    own_account = options['own_account']
+
+    def on_issue_done(issue, error):
+        key = issue.get('key')
+        if error is not None:
+            state.mark_failed(key)
+            return
+        # Se registra la fecha de la búsqueda que disparó la revisión. Solo se avanza a la
+        # fecha actual si todos los cambios posteriores (adjuntos, transiciones) los hizo el
+        # pipeline; un cambio de otra persona durante la revisión la vuelve a disparar.
+        updated = issue.get('fields', {}).get('updated')
+        if updated:
+            try:
+                current, only_own = only_own_changes_since(key, updated, own_account, jira_url, jira_token, jira_email)
+                if only_own:
+                    updated = current
+                else:
+                    print(f"{key} cambió durante la revisión; se revisará de nuevo en la siguiente consulta")
+            except (RequestException, ValueError, KeyError) as err:
+                print(f"No se pudieron revisar los cambios de {key}: {err}")
+        state.mark_done(key, updated)
+
+    print(f"Modo daemon: consultando cada {interval} s. Ctrl+C para detener.")
+    try:
+        while True:
+            # Las ramas de los planes cambian entre consultas: cada ciclo parte con índices nuevos
+            clear_branch_indexes()
+            poll_jql = state.build_jql(jql or JQL_QUERY)
+            watermarks = []
+            returned_keys = set()
+            poll = {'complete': False}
+
+            def new_issues():
+                try:
+                    for issue in iter_issues(jira_url, jira_token, jira_email, jql=poll_jql, raise_errors=True):
+                        returned_keys.add(issue.get('key'))
+                        updated = issue.get('fields', {}).get('updated')
+                        if updated:
+                            watermarks.append(jira_minute(updated))
+                        if state.is_new(issue):
+                            yield issue
+                except (RequestException, ValueError) as err:
+                    print(f"La consulta a Jira falló: {err}")
+                    return
+                poll['complete'] = True
+
+            processed = process_issues(new_issues(), config, workers, options, on_issue_done=on_issue_done)
+            # Una consulta incompleta no dice qué issues faltaron: la marca de agua y los
+            # pendientes se conservan y la siguiente consulta repite el mismo rango
+            if poll['complete']:
+                state.advance(max(watermarks, default=None), returned_keys)
+                print(f"{processed} issue(s) procesados. Marca de agua: {state.watermark}")
+            else:
+                print(f"{processed} issue(s) procesados; consulta incompleta, la marca de agua se mantiene en {state.watermark}")
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nDaemon detenido manualmente. Cerrando...")
+    finally:
+        close_pipeline(options)
+
+def run_webhook_listener(jql=None):
+    """
+    Modo webhook: escucha los eventos de Jira y Bitbucket y revisa los issues afectados
+    pocos segundos después de cada cambio, sin consultar Jira periódicamente.
+
+    Los eventos de un mismo issue se agrupan (debounce) y solo se revisan los issues que
+    además cumplen la consulta base (por ejemplo, estar en un estado de revisión QAT).
+
+    :param jql: Consulta base, por defecto JQL_QUERY.
+    """
+    settings = load_webhook_settings()
+    config, workers, options = open_pipeline()
+    jira_url, jira_token, jira_email = config[:3]
+
+    def on_issues(keys):
+        print(f"Eventos recibidos para: {', '.join(keys)}")
+        # Las ramas creadas desde el último lote deben aparecer en la búsqueda de builds
+        clear_branch_indexes()
+        keys_jql = f"({jql or JQL_QUERY}) and issue in ({','.join(keys)})"
+        # Una clave que no existe no debe descartar el lote completo
+        issues = iter_issues(jira_url, jira_token, jira_email, jql=keys_jql, validate_query='warn')
+        processed = process_issues(issues, config, workers, options)
+        print(f"{processed} de {len(keys)} issue(s) cumplen la consulta y fueron procesados")
+
+    # Los adjuntos y transiciones que hace el propio pipeline no deben disparar otra revisión.
+    # Jira Cloud solo envía el accountId del autor, así que se usan todos los identificadores de la cuenta
+    listener = WebhookListener(on_issues, ignored_users=options['own_account'], **settings).start()
+    print(f"Escuchando webhooks en {listener.url}/webhook/jira y {listener.url}/webhook/bitbucket. Ctrl+C para detener.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nListener detenido manualmente. Cerrando...")
+        # El lote en curso corre en el hilo del debouncer: se le pide detenerse entre etapas
+        options['cancel_event'].set()
+    finally:
+        # La bitácora y las sesiones se cierran solo cuando el lote en curso terminó
+        if not listener.stop(timeout=CANCEL_TIMEOUT):
+            print(f"El lote en curso no terminó en {CANCEL_TIMEOUT} s")
+        close_pipeline(options)
+
+USAGE = """Uso: python Main.py [CLAVES] [opciones]
+
+  CLAVES              Issues a revisar separados por coma, por ejemplo "PROJ-1","PROJ-2".
+
+  --queue             Revisa TODA la cola de QAT (JQL_QUERY: issues en "Por Hacer QAT",
+                      "Por Hacer QAT PROD" o "Por Revisar QAT"): encola builds y sube
+                      evidencias en cada ticket. Una ejecución sin claves lo exige.
+
+  --daemon            Consulta periódicamente la cola (o las claves) y revisa los issues
+                      nuevos o modificados ([daemon] en config.ini).
+  --webhook           Escucha webhooks de Jira y Bitbucket ([webhook] en config.ini).
+  --refresh-plans     Descarta la caché de planes Bamboo.
+  --reset-journal     Descarta la bitácora de ejecuciones interrumpidas.
+  -h, --help          Muestra esta ayuda.
+"""
 
 if __name__ == "__main__":
-    main_test()
+    if '-h' in sys.argv or '--help' in sys.argv:
+        print(USAGE)
+        sys.exit(0)
+    if '--refresh-plans' in sys.argv:
+        PLAN_CACHE.invalidate()
+    # Claves de issues opcionales, por ejemplo: python Main.py "PROJ-1","PROJ-2"
+    keys = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    keys_jql = 'issue in(' + ','.join(keys) + ')' if keys else None
+    one_shot = '--daemon' not in sys.argv and '--webhook' not in sys.argv
+    if keys_jql is None and one_shot and '--queue' not in sys.argv:
+        # Revisar toda la cola toca todos los tickets: no debe ser el resultado de olvidar las claves
+        print("Indique las claves de los issues a revisar, o --queue para revisar toda la cola de QAT.\n")
+        print(USAGE)
+        sys.exit(2)
+    if '--daemon' in sys.argv:
+        run_daemon(keys_jql)
+    elif '--webhook' in sys.argv:
+        run_webhook_listener(keys_jql)
+    else:
+        main_test(keys_jql)
@@ -0,0 +1,62 @@
+import re
+
+
+class AdfLinkExtractor:
+    """
+    Extrae URLs de un documento ADF (Atlassian Document Format) en una sola pasada.
+
+    Recorre el documento de forma iterativa (sin recursión) siguiendo `content` y `marks`,
+    y busca las URLs en el texto de los nodos `text`, en el `href` de sus marcas `link` y
+    en el `url` de los nodos `inlineCard`/`blockCard`/`embedCard`. Los patrones se
+    compilan una sola vez y solo se aplican a las cadenas que contienen "://".
+    """
+
+    def __init__(self, patterns):
+        """
+        :param patterns: Diccionario nombre -> expresión regular (str) de cada tipo de URL.
+        """
+        self._patterns = [(name, re.compile(pattern)) for name, pattern in patterns.items()]
+
+    def _scan(self, string, found):
+        for name, pattern in self._patterns:
+            urls = found[name]
+            for url in pattern.findall(string):
+                urls[url] = None
+
+    def extract(self, document):
+        """
+        :param document: Documento ADF (dict/list) o texto plano.
+        :return: Diccionario nombre -> lista de URLs sin duplicados, en orden de aparición.
+        """
+        found = {name: {} for name, _ in self._patterns}  # dict como conjunto ordenado
+        if isinstance(document, str):
+            # Campo en texto plano (por ejemplo, con la API v2 de Jira)
+            document = {'type': 'text', 'text': document}
+
+        stack = [document]
+        pop, extend = stack.pop, stack.extend
+        while stack:
+            node = pop()
+            if type(node) is not dict:
+                if type(node) is list:
+                    # Los hijos se apilan al revés para visitarlos en el orden del documento
+                    extend(reversed(node))
+                continue
+            get = node.get
+            text = get('text')
+            # Filtro barato antes de las expresiones regulares: la mayoría del texto no tiene URLs
+            if text and '://' in text and get('type') == 'text':
+                self._scan(text, found)
+            attrs = get('attrs')
+            if attrs:
+                # href de las marcas link; url de inlineCard, blockCard y embedCard
+                for value in (attrs.get('href'), attrs.get('url')):
+                    if isinstance(value, str) and '://' in value:
+                        self._scan(value, found)
+            marks = get('marks')
+            if marks:
+                extend(marks)
+            content = get('content')
+            if content:
+                extend(reversed(content))
+        return {name: list(urls) for name, urls in found.items()}
@@ -0,0 +1,115 @@
+"""
+Benchmark: extracción de URLs de los campos de pauta (ADF) con el recorrido anterior
+(función recursiva + join del texto, o json.dumps del campo completo, y una segunda
+búsqueda por cada URL) contra AdfLinkExtractor, sobre documentos ADF sintéticos grandes.
+
+Uso:
+    python bench_adf_extractor.py [numero_de_parrafos] [repeticiones]
+"""
+import json
+import re
+import sys
+import time
+from adf_links import AdfLinkExtractor
+
+URL_PATTERN_BITBUCKET = r'https://bitbucket\.org/[^\s"\'{}]+'
+URL_PATTERN_BAMBOO = r'http://bamboo\.afphabitat\.net:8085/[^\s"\'{}]+'
+
+
+def legacy_clean_and_remove_duplicates(urls, url_pattern):
+    seen_urls = set()
+    cleaned_urls = []
+    for url in urls:
+        match = re.search(url_pattern, url)
+        if match:
+            url = match.group()
+            if url not in seen_urls:
+                seen_urls.add(url)
+                cleaned_urls.append(url)
+    return cleaned_urls
+
+
+def legacy_bamboo(json_data):
+    texts = []
+
+    def extract_text(content):
+        if isinstance(content, dict):
+            if content.get('type') == 'text':
+                texts.append(content.get('text', ''))
+            for value in content.values():
+                extract_text(value)
+        elif isinstance(content, list):
+            for item in content:
+                extract_text(item)
+
+    extract_text(json_data)
+    json_text = ' '.join(texts)
+    json_text = json_text.replace('\n', ' ')
+    json_text = json_text.replace('\r', ' ')
+    json_text = ' '.join(json_text.split())
+    urls = re.findall(URL_PATTERN_BAMBOO, json_text)
+    return legacy_clean_and_remove_duplicates(urls, URL_PATTERN_BAMBOO)
+
+
+def legacy_bitbucket(json_data):
+    urls = re.findall(URL_PATTERN_BITBUCKET, json.dumps(json_data))
+    return legacy_clean_and_remove_duplicates(urls, URL_PATTERN_BITBUCKET)
+
+
+def build_document(paragraphs):
+    """Documento ADF con texto, enlaces (marks), tarjetas y URLs repetidas."""
+    content = []
+    for index in range(paragraphs):
+        repo = index % 40
+        pr_url = f"https://bitbucket.org/afphabitat/afph-back-servicio-{repo}/pull-requests/{index % 25}"
+        plan_url = f"http://bamboo.afphabitat.net:8085/browse/WL12CRT-PLAN{repo}"
+        content.append({
+            "type": "paragraph",
+            "content": [
+                {"type": "text", "text": f"Componente {repo}: revisar cambios del PR "},
+                {"type": "text", "text": pr_url, "marks": [{"type": "link", "attrs": {"href": pr_url}}]},
+                {"type": "text", "text": f" y ejecutar el plan {plan_url} antes del pase. " * 2},
+                {"type": "inlineCard", "attrs": {"url": plan_url}},
+                {"type": "hardBreak"}
+            ]
+        })
+        if index % 10 == 0:
+            content.append({
+                "type": "table",
+                "content": [{"type": "tableRow", "content": [
+                    {"type": "tableCell", "attrs": {"colspan": 1}, "content": [
+                        {"type": "paragraph", "content": [{"type": "text", "text": f"Fila {index} sin URLs " * 5}]}
+                    ]}
+                ]}]
+            })
+    return {"version": 1, "type": "doc", "content": content}
+
+
+def measure(function, repetitions):
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        result = function()
+    return (time.perf_counter() - start) / repetitions, result
+
+
+def main():
+    paragraphs = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    document = build_document(paragraphs)
+    extractor = AdfLinkExtractor({'bitbucket': URL_PATTERN_BITBUCKET, 'bamboo': URL_PATTERN_BAMBOO})
+
+    legacy_time, (legacy_prs, legacy_plans) = measure(
+        lambda: (legacy_bitbucket(document), legacy_bamboo(document)), repetitions)
+    new_time, new_urls = measure(lambda: extractor.extract(document), repetitions)
+
+    print(f"Documento: {paragraphs} párrafos, {len(json.dumps(document)) / 1024:.0f} KB en JSON")
+    print(f"Recorrido anterior : {legacy_time * 1000:.1f} ms ({len(legacy_prs)} PRs, {len(legacy_plans)} planes)")
+    print(f"AdfLinkExtractor   : {new_time * 1000:.1f} ms ({len(new_urls['bitbucket'])} PRs, {len(new_urls['bamboo'])} planes)")
+    print(f"Mejora             : {legacy_time / new_time:.1f}x")
+    if new_urls['bitbucket'] != legacy_prs or new_urls['bamboo'] != legacy_plans:
+        print("Los resultados difieren del recorrido anterior")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
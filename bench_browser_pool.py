@@ -0,0 +1,81 @@
+"""
+Benchmark: capturas con un navegador nuevo por issue (secuencial) contra el BrowserPool
+(navegadores reutilizados y URLs en paralelo), usando un servidor stub que simula el
+dashboard de Sonar. Requiere Chromium/Chrome y chromedriver (por ejemplo en Linux).
+
+Uso:
+    python bench_browser_pool.py [issues] [urls_por_issue] [tamaño_pool]
+"""
+import shutil
+import sys
+import tempfile
+import time
+from browser_pool import BrowserPool, chromium_driver_factory
+from stub_server import StubServer
+from utils import wait_for_page_ready
+
+# Página que dibuja el panel del quality gate después de una "consulta" de 300 ms
+DASHBOARD_HTML = """<!DOCTYPE html>
+<html><head><title>Sonar stub</title></head>
+<body>
+<div id="root">Cargando...</div>
+<script>
+setTimeout(function () {
+  document.getElementById('root').innerHTML =
+    '<div class="overview-quality-gate">Quality Gate: Passed</div>' +
+    '<div class="overview-measures">Coverage 85.0% - Bugs 0</div>';
+}, 300);
+</script>
+</body></html>"""
+
+
+def dashboard_route(handler):
+    return 200, 'text/html; charset=utf-8', DASHBOARD_HTML
+
+
+def bench_navegador_por_issue(factory, batches, temp_dir):
+    start = time.perf_counter()
+    for batch_index, urls in enumerate(batches):
+        driver = factory()
+        for index, url in enumerate(urls):
+            driver.get(url)
+            wait_for_page_ready(driver)
+            driver.save_screenshot(f"{temp_dir}/cold_{batch_index}_{index}.png")
+        driver.quit()
+    return time.perf_counter() - start
+
+
+def bench_pool(factory, batches, size, temp_dir):
+    start = time.perf_counter()
+    pool = BrowserPool(factory, size=size).start()
+    for urls in batches:
+        pool.capture(urls, temp_dir)
+    pool.close()
+    return time.perf_counter() - start
+
+
+def main():
+    issues = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    urls_per_issue = int(sys.argv[2]) if len(sys.argv) > 2 else 9
+    size = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    factory = chromium_driver_factory()
+    temp_dir = tempfile.mkdtemp(prefix='bench_browser_pool_')
+
+    with StubServer({('GET', '/dashboard'): dashboard_route}) as server:
+        batches = [[f"{server.url}/dashboard?id=proyecto-{issue}-{index}" for index in range(urls_per_issue)]
+                   for issue in range(issues)]
+        secuencial = bench_navegador_por_issue(factory, batches, temp_dir)
+        con_pool = bench_pool(factory, batches, size, temp_dir)
+
+    shutil.rmtree(temp_dir, ignore_errors=True)
+
+    total = issues * urls_per_issue
+    print(f"Issues: {issues}, URLs por issue: {urls_per_issue}, navegadores en el pool: {size}")
+    print(f"Navegador nuevo por issue : {secuencial:.2f} s ({secuencial / total:.3f} s/URL)")
+    print(f"BrowserPool               : {con_pool:.2f} s ({con_pool / total:.3f} s/URL)")
+    print(f"Mejora                    : x{secuencial / con_pool:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Benchmark: peticiones con requests.get (conexión nueva por llamada) contra la sesión
+keep-alive compartida de http_client, usando un servidor stub local.
+
+Uso:
+    python bench_http_client.py [numero_de_peticiones]
+"""
+import sys
+import time
+import requests
+from requests.auth import HTTPBasicAuth
+from http_client import configure_backend, close_sessions, set_rate
+from stub_server import StubServer
+
+PLAN_XML = '<plan key="WL12CRT-OSDQA" shortName="afph-back-ejemplo QA"/>'
+
+
+def plan_route(handler):
+    return 200, 'application/xml', PLAN_XML
+
+
+def bench_requests_sin_sesion(url, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        response = requests.get(url, auth=HTTPBasicAuth('user', 'password'))
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def bench_sesion_compartida(url, n):
+    # Se mide la reutilización de conexiones, no el limitador de tasa
+    set_rate('bamboo', 0)
+    session = configure_backend('bamboo', auth=('user', 'password'))
+    start = time.perf_counter()
+    for _ in range(n):
+        response = session.get(url)
+        response.raise_for_status()
+    elapsed = time.perf_counter() - start
+    close_sessions()
+    return elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+    with StubServer({('GET', '/rest/api/latest/plan/WL12CRT-OSDQA'): plan_route}) as server:
+        url = f"{server.url}/rest/api/latest/plan/WL12CRT-OSDQA"
+
+        # Calentamiento para no medir la primera conexión
+        requests.get(url)
+
+        sin_sesion = bench_requests_sin_sesion(url, n)
+        con_sesion = bench_sesion_compartida(url, n)
+
+    print(f"Peticiones: {n}")
+    print(f"requests.get sin sesión : {sin_sesion:.3f} s ({sin_sesion / n * 1000:.3f} ms/petición)")
+    print(f"Sesión keep-alive       : {con_sesion:.3f} s ({con_sesion / n * 1000:.3f} ms/petición)")
+    print(f"Mejora                  : x{sin_sesion / con_sesion:.2f}")
+
+
+if __name__ == "__main__":
+    main()
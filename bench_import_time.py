@@ -0,0 +1,80 @@
+"""
+Control del tiempo de importación de Main.py con `python -X importtime`.
+
+Importa Main en un proceso nuevo, desde un directorio temporal vacío, y falla (código de
+salida 1) si:
+  - el tiempo acumulado de importación de Main supera el presupuesto,
+  - se cargó alguna dependencia pesada que solo usan etapas opcionales
+    (Selenium, psutil, win10toast, Pillow, multiprocessing),
+  - la importación dejó archivos en el directorio de trabajo (efectos secundarios).
+
+Uso:
+    python bench_import_time.py [presupuesto_ms] [repeticiones]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+# Módulos que no deben cargarse solo por importar Main
+LAZY_MODULES = ['selenium', 'psutil', 'win10toast', 'PIL', 'multiprocessing']
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def import_main():
+    """
+    Importa Main en un proceso nuevo.
+
+    :return: (microsegundos acumulados de Main, módulos de primer nivel importados, archivos creados)
+    """
+    with tempfile.TemporaryDirectory() as work_dir:
+        env = dict(os.environ, PYTHONPATH=REPO_DIR)
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import Main'],
+                                cwd=work_dir, env=env, capture_output=True, text=True)
+        if result.returncode != 0:
+            print(result.stderr[-2000:])
+            sys.exit(f"No se pudo importar Main (código {result.returncode})")
+        created = os.listdir(work_dir)
+
+    cumulative = None
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        modules.add(name.split('.')[0])
+        if name == 'Main':
+            cumulative = int(cumulative_us)
+    return cumulative, modules, created
+
+
+def main():
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else 300
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    # Se toma el mejor de varios intentos para reducir el ruido de la máquina
+    times = []
+    for _ in range(repetitions):
+        cumulative, modules, created = import_main()
+        times.append(cumulative / 1000)
+    best = min(times)
+
+    errors = []
+    loaded = [module for module in LAZY_MODULES if module in modules]
+    if loaded:
+        errors.append(f"Dependencias pesadas cargadas al importar Main: {', '.join(loaded)}")
+    if created:
+        errors.append(f"Importar Main creó archivos: {', '.join(created)}")
+    if best > budget_ms:
+        errors.append(f"Importar Main tomó {best:.1f} ms, presupuesto {budget_ms:.0f} ms")
+
+    print(f"Importación de Main: {best:.1f} ms (mejor de {repetitions}), presupuesto {budget_ms:.0f} ms")
+    for error in errors:
+        print(f"ERROR: {error}")
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: reportes Sonar generados desde la API web (sin navegador) contra un servidor stub
+que simula los endpoints de quality gate y medidas.
+
+Como referencia, capture_screenshots_with_cookies necesita arrancar Edge y esperar el
+dibujado del dashboard por cada URL (segundos por URL y cientos de MB de memoria).
+
+Uso:
+    python bench_sonar_report.py [numero_de_proyectos] [png|html|md]
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from urllib.parse import urlparse, parse_qs
+from http_client import close_sessions
+from sonar_report import build_sonar_reports
+from stub_server import StubServer
+
+
+def project_status_route(handler):
+    project = parse_qs(urlparse(handler.path).query)['projectKey'][0]
+    status = 'ERROR' if project.endswith('3') else 'OK'
+    return 200, 'application/json', json.dumps({
+        "projectStatus": {
+            "status": status,
+            "conditions": [{
+                "status": status,
+                "metricKey": "new_coverage",
+                "comparator": "LT",
+                "errorThreshold": "80",
+                "actualValue": "72.5" if status == 'ERROR' else "91.0"
+            }]
+        }
+    })
+
+
+def measures_route(handler):
+    project = parse_qs(urlparse(handler.path).query)['component'][0]
+    return 200, 'application/json', json.dumps({
+        "component": {
+            "key": project,
+            "measures": [
+                {"metric": "coverage", "value": "85.3"},
+                {"metric": "bugs", "value": "0"},
+                {"metric": "vulnerabilities", "value": "1"},
+                {"metric": "security_hotspots", "value": "2"},
+                {"metric": "code_smells", "value": "14"},
+                {"metric": "duplicated_lines_density", "value": "1.2"},
+                {"metric": "ncloc", "value": "12034"}
+            ]
+        }
+    })
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 9
+    report_format = sys.argv[2] if len(sys.argv) > 2 else 'png'
+
+    routes = {
+        ('GET', '/api/qualitygates/project_status'): project_status_route,
+        ('GET', '/api/measures/component'): measures_route
+    }
+    with StubServer(routes) as server:
+        urls = [f"{server.url}/dashboard?id=afph-back-proyecto-{index}&branch=feature-x" for index in range(n)]
+        temp_dir = tempfile.mkdtemp(prefix='bench_sonar_report_')
+
+        tracemalloc.start()
+        start = time.perf_counter()
+        build_sonar_reports(urls, report_format, temp_dir)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        files = os.listdir(temp_dir)
+        size = sum(os.path.getsize(os.path.join(temp_dir, name)) for name in files)
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        close_sessions()
+
+    print(f"Proyectos: {n}, formato: {report_format}")
+    print(f"Tiempo total      : {elapsed:.3f} s ({elapsed / n * 1000:.1f} ms/proyecto)")
+    print(f"Memoria pico      : {peak / 1024 / 1024:.2f} MB")
+    print(f"Archivos generados: {len(files)} ({size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
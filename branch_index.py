@@ -0,0 +1,85 @@
+import threading
+from http_client import get_session
+
+BAMBOO_REST_URL = "http://bamboo.afphabitat.net:8085/rest/api/latest"
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+class BambooBranchIndex:
+    """
+    Índice de las ramas de un plan Bamboo indexado por shortName.
+
+    La lista de ramas se descarga una sola vez (JSON) y cada rama guarda su key, si está
+    habilitada y su link. Las búsquedas posteriores no hacen peticiones a Bamboo.
+    """
+
+    def __init__(self, plan_key, bamboo_user, bamboo_password):
+        """
+        :param plan_key: Clave del plan de Bamboo (ej. PROJ-PLAN).
+        """
+        self.plan_key = plan_key
+        self.bamboo_user = bamboo_user
+        self.bamboo_password = bamboo_password
+        self.branches = None  # shortName -> {'key', 'enabled', 'link'}
+        self._lock = threading.Lock()
+
+    def _fetch(self):
+        """Descarga todas las ramas del plan y construye el índice."""
+        url = f"{BAMBOO_REST_URL}/plan/{self.plan_key}/branch.json"
+        session = get_session('bamboo', auth=(self.bamboo_user, self.bamboo_password))
+        # Bamboo pagina de a 25 ramas por defecto
+        response = session.get(url, params={"max-result": 10000})
+        response.raise_for_status()
+
+        branches = {}
+        for branch in response.json().get('branches', {}).get('branch', []):
+            branches[branch['shortName']] = {
+                'key': branch.get('key'),
+                'enabled': branch.get('enabled', False),
+                'link': branch.get('link', {}).get('href')
+            }
+        return branches
+
+    def _ensure_loaded(self):
+        with self._lock:
+            if self.branches is None:
+                self.branches = self._fetch()
+            return self.branches
+
+    def get(self, short_name):
+        """Devuelve los datos de la rama con ese shortName, o None si el plan no la tiene."""
+        return self._ensure_loaded().get(short_name)
+
+    def update(self, short_name, key=None, enabled=True, link=None):
+        """Actualiza en el índice una rama recién creada o habilitada, sin volver a consultar Bamboo."""
+        branches = self._ensure_loaded()
+        with self._lock:
+            branch = branches.setdefault(short_name, {'key': None, 'enabled': False, 'link': None})
+            branch['enabled'] = enabled
+            if key is not None:
+                branch['key'] = key
+            if link is not None:
+                branch['link'] = link
+
+    def refresh(self):
+        """Descarta el índice para que la próxima búsqueda vuelva a descargar las ramas."""
+        with self._lock:
+            self.branches = None
+
+
+def get_branch_index(plan_key, bamboo_user, bamboo_password):
+    """Devuelve el índice de ramas compartido de un plan, creándolo la primera vez."""
+    with _indexes_lock:
+        index = _indexes.get(plan_key)
+        if index is None:
+            index = BambooBranchIndex(plan_key, bamboo_user, bamboo_password)
+            _indexes[plan_key] = index
+    return index
+
+
+def clear_branch_indexes():
+    """Olvida todos los índices (por ejemplo al empezar una nueva ejecución)."""
+    with _indexes_lock:
+        _indexes.clear()
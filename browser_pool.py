@@ -0,0 +1,266 @@
+import os
+import queue
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.request import pathname2url
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from utils import generate_random_folder_name, wait_for_page_ready
+
+
+# Base de cookies del perfil: sin ella la copia no tiene la sesión de Sonar
+COOKIES_DB = os.path.join('Network', 'Cookies')
+
+
+def _copy_profile_file(src, dst):
+    """
+    copy2 que tolera las bases SQLite bloqueadas por un Edge en ejecución (por ejemplo
+    Network/Cookies en Windows): si la copia directa falla, se copian con la API de
+    respaldo de SQLite.
+    """
+    try:
+        return shutil.copy2(src, dst)
+    except PermissionError as e:
+        try:
+            source = sqlite3.connect(f"file:{pathname2url(os.path.abspath(src))}?mode=ro", uri=True)
+            try:
+                target = sqlite3.connect(dst)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+            finally:
+                source.close()
+        except sqlite3.Error:
+            # No era una base SQLite (o tampoco pudo leerse): no dejar un archivo a medias
+            if os.path.exists(dst):
+                os.remove(dst)
+            raise PermissionError(f"{src} está bloqueado por otro proceso: {e}") from e
+        return dst
+
+
+def _clone_profile(user_data_dir, profile_directory):
+    """
+    Copia el perfil (y 'Local State', que cifra las cookies) a un directorio temporal.
+
+    Dos instancias del navegador no pueden abrir el mismo user-data-dir a la vez, así que
+    cada instancia del pool usa su propia copia con las cookies de la sesión. Los archivos
+    bloqueados que no son necesarios se omiten; si no se puede copiar la base de cookies
+    se lanza RuntimeError con la causa.
+    """
+    clone_dir = tempfile.mkdtemp(prefix='browser_pool_')
+    local_state = os.path.join(user_data_dir, 'Local State')
+    if os.path.exists(local_state):
+        shutil.copy2(local_state, clone_dir)
+    source = os.path.join(user_data_dir, profile_directory)
+    try:
+        shutil.copytree(
+            source,
+            os.path.join(clone_dir, profile_directory),
+            # LOCK y lockfile los mantiene tomados un Edge abierto y no hacen falta en la copia
+            ignore=shutil.ignore_patterns('Cache', 'Code Cache', 'GPUCache', 'Service Worker', 'LOCK', 'lockfile'),
+            copy_function=_copy_profile_file,
+            ignore_dangling_symlinks=True
+        )
+    except shutil.Error as e:
+        failed = [(src, why) for src, _, why in e.args[0]]
+        if any(os.path.relpath(src, source) == COOKIES_DB for src, _ in failed):
+            shutil.rmtree(clone_dir, ignore_errors=True)
+            raise RuntimeError(f"No se pudo copiar la base de cookies del perfil {source} "
+                               f"(¿Edge está abierto?): {failed[0][1]}") from e
+        for src, why in failed:
+            print(f"Se omite {src} al copiar el perfil: {why}")
+    return clone_dir
+
+
+def edge_driver_factory(edge_driver_path, edge_user_data_dir=None, edge_profile_directory=None):
+    """
+    Devuelve una función que crea instancias headless de Microsoft Edge con el perfil indicado.
+
+    :param edge_driver_path: Ruta al archivo ejecutable de EdgeDriver.
+    :param edge_user_data_dir: Directorio de datos del usuario de Edge (se clona por instancia).
+    :param edge_profile_directory: Nombre del directorio del perfil de usuario en Edge.
+    """
+    from selenium.webdriver.edge.service import Service
+    from selenium.webdriver.edge.options import Options
+
+    def factory():
+        edge_options = Options()
+        profile_dir = None
+        if edge_user_data_dir and edge_profile_directory:
+            profile_dir = _clone_profile(edge_user_data_dir, edge_profile_directory)
+            edge_options.add_argument(f'user-data-dir={profile_dir}')
+            edge_options.add_argument(f'profile-directory={edge_profile_directory}')
+        edge_options.add_argument('--headless')
+        edge_options.add_argument('--window-size=1920,1080')
+        service = Service(executable_path=edge_driver_path) if edge_driver_path else Service()
+        driver = webdriver.Edge(service=service, options=edge_options)
+        driver.pool_profile_dir = profile_dir
+        return driver
+
+    return factory
+
+
+def chromium_driver_factory(chromedriver_path=None, binary_location=None):
+    """
+    Devuelve una función que crea instancias headless de Chromium/Chrome (por ejemplo en Linux).
+
+    :param chromedriver_path: Ruta a chromedriver; si es None, Selenium lo busca.
+    :param binary_location: Ruta al ejecutable de Chromium si no es el predeterminado.
+    """
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.chrome.options import Options
+
+    def factory():
+        chrome_options = Options()
+        if binary_location:
+            chrome_options.binary_location = binary_location
+        chrome_options.add_argument('--headless=new')
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--window-size=1920,1080')
+        service = Service(executable_path=chromedriver_path) if chromedriver_path else Service()
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        driver.pool_profile_dir = None
+        return driver
+
+    return factory
+
+
+class BrowserPool:
+    """
+    Pool de navegadores headless reutilizables para capturar pantallas en paralelo.
+
+    Mantiene `size` instancias abiertas entre issues, las entrega de a una a cada captura
+    y las reemplaza después de `max_pages` páginas o cuando el navegador falla.
+    """
+
+    def __init__(self, driver_factory, size=2, max_pages=50, timeout=20):
+        """
+        :param driver_factory: Función sin argumentos que crea un WebDriver nuevo.
+        :param size: Número de navegadores abiertos a la vez.
+        :param max_pages: Páginas que visita un navegador antes de reciclarlo.
+        :param timeout: Espera máxima por URL para que la página quede lista.
+        """
+        self.driver_factory = driver_factory
+        self.size = size
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self._idle = queue.Queue()
+        self._pages = {}  # id(driver) -> páginas visitadas
+        self._lock = threading.Lock()
+        self._last_error = None  # causa del último fallo al crear un navegador
+        for _ in range(size):
+            # None = navegador aún no creado; se crea al primer uso o en start()
+            self._idle.put(None)
+
+    def start(self):
+        """Abre todos los navegadores del pool en paralelo para tenerlos listos."""
+        slots = [self._idle.get() for _ in range(self.size)]
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            drivers = list(executor.map(lambda driver: driver or self._create(), slots))
+        for driver in drivers:
+            self._idle.put(driver)
+        return self
+
+    def _create(self):
+        try:
+            driver = self.driver_factory()
+        except Exception as e:
+            print(f"Error al iniciar el navegador del pool: {e}")
+            self._last_error = e
+            return None
+        with self._lock:
+            self._pages[id(driver)] = 0
+        return driver
+
+    def _discard(self, driver):
+        with self._lock:
+            self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+        profile_dir = getattr(driver, 'pool_profile_dir', None)
+        if profile_dir:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+
+    @contextmanager
+    def driver(self):
+        """Presta un navegador del pool; se devuelve (o se recicla) al salir del bloque."""
+        driver = self._idle.get()
+        if driver is None:
+            driver = self._create()
+            if driver is None:
+                self._idle.put(None)
+                raise WebDriverException(f"No se pudo iniciar un navegador para el pool: {self._last_error}")
+
+        healthy = True
+        try:
+            yield driver
+        except WebDriverException:
+            healthy = False
+            raise
+        finally:
+            with self._lock:
+                self._pages[id(driver)] = self._pages.get(id(driver), 0) + 1
+                pages = self._pages[id(driver)]
+            if healthy and pages < self.max_pages:
+                self._idle.put(driver)
+            else:
+                # Navegador caído o con demasiadas páginas: se reemplaza en el próximo uso
+                self._discard(driver)
+                self._idle.put(None)
+
+    def _capture_one(self, url, screenshot_path, retries=1):
+        for attempt in range(retries + 1):
+            try:
+                with self.driver() as driver:
+                    start = time.monotonic()
+                    driver.get(url)
+                    if not wait_for_page_ready(driver, self.timeout):
+                        print(f"La página {url} no terminó de cargar en {self.timeout} s, se captura de todas formas")
+                    render_time = time.monotonic() - start
+                    driver.save_screenshot(screenshot_path)
+                    print(f"Captura de {url} en {render_time:.2f} s guardada en: {screenshot_path}")
+                    return screenshot_path
+            except WebDriverException as e:
+                print(f"Error del navegador al capturar {url} (intento {attempt + 1}): {e}")
+        return None
+
+    def capture(self, urls, temp_dir=None):
+        """
+        Captura todas las URLs en paralelo usando los navegadores del pool.
+
+        :param urls: Lista de URLs para abrir y capturar.
+        :param temp_dir: Carpeta de destino; si es None se crea una temporal.
+        :return: Carpeta con las capturas.
+        """
+        if temp_dir is None:
+            temp_dir = os.path.join(tempfile.gettempdir(), generate_random_folder_name())
+        os.makedirs(temp_dir, exist_ok=True)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        paths = [os.path.join(temp_dir, f"screenshot_{timestamp}_{index:02d}.png") for index in range(len(urls))]
+
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            list(executor.map(self._capture_one, urls, paths))
+        print(f"Tiempo total de captura: {time.monotonic() - start:.2f} s para {len(urls)} URLs")
+        return temp_dir
+
+    def close(self):
+        """Cierra todos los navegadores inactivos del pool."""
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if driver is not None:
+                self._discard(driver)
@@ -0,0 +1,80 @@
+import configparser
+import threading
+
+# Máximo de operaciones simultáneas por backend, compartido por todos los issues en proceso
+DEFAULT_LIMITS = {
+    "jira": 4,
+    "bitbucket": 8,
+    "bamboo": 4,
+    "sonar": 4,
+    "browser": 1  # kill_edge_processes cierra todos los Edge: solo un navegador a la vez
+}
+
+# Issues procesados en paralelo por main_test (1 = modo secuencial)
+DEFAULT_WORKERS = 1
+
+_semaphores = {}
+_semaphores_lock = threading.Lock()
+
+
+class PipelineCancelled(Exception):
+    """Se lanza en los hilos de trabajo cuando se canceló la ejecución (por ejemplo, con Ctrl+C)."""
+
+
+def raise_if_cancelled(cancel_event):
+    """Lanza PipelineCancelled si el evento de cancelación (threading.Event) está activo."""
+    if cancel_event is not None and cancel_event.is_set():
+        raise PipelineCancelled("Ejecución cancelada")
+
+
+def backend_slot(backend):
+    """
+    Devuelve el semáforo de un backend para usarlo como contexto:
+
+        with backend_slot('bamboo'):
+            ...
+
+    :param backend: Nombre del backend ('jira', 'bitbucket', 'bamboo', 'sonar', 'browser').
+    """
+    with _semaphores_lock:
+        semaphore = _semaphores.get(backend)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(DEFAULT_LIMITS.get(backend, 4))
+            _semaphores[backend] = semaphore
+    return semaphore
+
+
+def configure_limits(**limits):
+    """
+    Cambia el límite de concurrencia de uno o varios backends, por ejemplo configure_limits(bamboo=2).
+
+    Debe llamarse antes de empezar a procesar issues: los semáforos se recrean.
+    """
+    with _semaphores_lock:
+        for backend, limit in limits.items():
+            DEFAULT_LIMITS[backend] = limit
+            _semaphores[backend] = threading.BoundedSemaphore(limit)
+
+
+def load_concurrency_limits(config_file='config.ini'):
+    """
+    Lee la sección opcional [concurrency] del archivo INI y aplica sus límites.
+
+        [concurrency]
+        workers = 8
+        jira = 4
+        bamboo = 2
+        browser = 1
+
+    :return: Número de issues a procesar en paralelo.
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file)
+
+    limits = {}
+    for backend in DEFAULT_LIMITS:
+        if config.has_option('concurrency', backend):
+            limits[backend] = config.getint('concurrency', backend)
+    configure_limits(**limits)
+
+    return config.getint('concurrency', 'workers', fallback=DEFAULT_WORKERS)
@@ -0,0 +1,212 @@
+import configparser
+import threading
+import time
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from concurrency import backend_slot
+from retry_policy import DEFAULT_RATES, RetryPolicy, TokenBucket
+
+# Tamaños de pool por defecto para cada backend (conexiones keep-alive por host)
+DEFAULT_POOL_SIZES = {
+    "jira": 10,
+    "bitbucket": 10,
+    "bamboo": 20,
+    "sonar": 10
+}
+
+# Timeout por defecto (conexión, lectura) en segundos de las peticiones sin timeout propio.
+# Sin él un socket colgado bloquea al hilo para siempre, ocupando su cupo del backend
+DEFAULT_TIMEOUT = (10, 60)
+
+DEFAULT_HEADERS = {
+    # Sin Content-Type por defecto: las subidas multipart deben fijar el suyo
+    "jira": {
+        "Accept": "application/json"
+    },
+    "bitbucket": {
+        "Accept": "application/json"
+    },
+    "bamboo": {},
+    "sonar": {}
+}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+# Un limitador de tasa por host, compartido por todas las sesiones y todos los hilos
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+retry_policy = RetryPolicy()
+
+
+def get_bucket(backend, url):
+    """Devuelve el token bucket del host de la URL, creándolo con la tasa del backend."""
+    host = urlparse(url).netloc
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(DEFAULT_RATES.get(backend, 0))
+            _buckets[host] = bucket
+    return bucket
+
+
+class LimitedSession(requests.Session):
+    """
+    Sesión que respeta el límite de peticiones simultáneas de su backend (ver concurrency.py),
+    la tasa máxima por host y reintenta las fallas transitorias según retry_policy.
+
+    Los métodos no idempotentes (POST) solo se reintentan si se llama con
+    retry_on_reject=True y el servidor rechazó la petición sin procesarla (429/503).
+
+    Las peticiones sin `timeout` usan DEFAULT_TIMEOUT.
+    """
+
+    def __init__(self, backend):
+        super().__init__()
+        self.backend = backend
+
+    def request(self, method, url, *args, retry_on_reject=False, **kwargs):
+        kwargs.setdefault('timeout', DEFAULT_TIMEOUT)
+        bucket = get_bucket(self.backend, url)
+        attempt = 0
+        while True:
+            bucket.acquire()
+            response = None
+            error = None
+            try:
+                with backend_slot(self.backend):
+                    response = super().request(method, url, *args, **kwargs)
+            except requests.exceptions.RequestException as e:
+                error = e
+
+            if not retry_policy.should_retry(method, attempt, response, error, retry_on_reject):
+                if error is not None:
+                    raise error
+                return response
+
+            wait = retry_policy.delay(attempt, response)
+            if response is not None:
+                if response.status_code == 429:
+                    # El servidor pidió bajar el ritmo: pausar a todos los hilos que usan ese host
+                    bucket.pause(wait)
+                reason = f"código {response.status_code}"
+                response.close()
+            else:
+                reason = str(error)
+            attempt += 1
+            print(f"Reintentando {method} {url} en {wait:.1f} s (intento {attempt}, {reason})")
+            time.sleep(wait)
+
+
+def _build_session(backend, pool_size, headers=None, auth=None):
+    """Crea una sesión keep-alive con un pool de conexiones del tamaño indicado."""
+    session = LimitedSession(backend)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if headers:
+        session.headers.update(headers)
+    if auth is not None:
+        session.auth = HTTPBasicAuth(*auth) if isinstance(auth, tuple) else auth
+    return session
+
+
+def configure_backend(backend, auth=None, headers=None, pool_size=None):
+    """
+    Configura (o reconfigura) la sesión compartida de un backend.
+
+    :param backend: Nombre del backend ('jira', 'bitbucket', 'bamboo', 'sonar').
+    :param auth: Tupla (usuario, password) o instancia de autenticación de requests.
+    :param headers: Encabezados por defecto adicionales para todas las peticiones.
+    :param pool_size: Número máximo de conexiones keep-alive por host.
+    :return: La sesión configurada.
+    """
+    all_headers = dict(DEFAULT_HEADERS.get(backend, {}))
+    all_headers.update(headers or {})
+    size = pool_size or DEFAULT_POOL_SIZES.get(backend, 10)
+
+    session = _build_session(backend, size, all_headers, auth)
+    with _sessions_lock:
+        previous = _sessions.get(backend)
+        _sessions[backend] = session
+    if previous is not None:
+        previous.close()
+    return session
+
+
+def get_session(backend, auth=None, headers=None):
+    """
+    Devuelve la sesión compartida de un backend, creándola la primera vez.
+
+    La sesión se comparte entre hilos: el pool de conexiones de urllib3 es
+    thread-safe y la autenticación/encabezados se fijan una sola vez al crearla.
+
+    :param backend: Nombre del backend ('jira', 'bitbucket', 'bamboo', 'sonar').
+    :param auth: Credenciales a usar si la sesión aún no existe.
+    :param headers: Encabezados a usar si la sesión aún no existe.
+    :return: requests.Session reutilizable.
+    """
+    session = _sessions.get(backend)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(backend)
+        if session is None:
+            all_headers = dict(DEFAULT_HEADERS.get(backend, {}))
+            all_headers.update(headers or {})
+            session = _build_session(backend, DEFAULT_POOL_SIZES.get(backend, 10), all_headers, auth)
+            _sessions[backend] = session
+    return session
+
+
+def load_http_settings(config_file='config.ini'):
+    """
+    Lee los tamaños de pool, la tasa por host y los reintentos desde la sección opcional [http].
+
+        [http]
+        jira_pool_size = 10
+        bamboo_pool_size = 20
+        jira_rate = 10          ; peticiones por segundo por host (por defecto 0 = sin límite)
+        max_retries = 4
+        connect_timeout = 10    ; segundos para establecer la conexión
+        read_timeout = 60       ; segundos máximos sin recibir datos de la respuesta
+    """
+    global DEFAULT_TIMEOUT
+    config = configparser.ConfigParser()
+    config.read(config_file)
+
+    for backend in DEFAULT_POOL_SIZES:
+        if config.has_option('http', f'{backend}_pool_size'):
+            DEFAULT_POOL_SIZES[backend] = config.getint('http', f'{backend}_pool_size')
+        if config.has_option('http', f'{backend}_rate'):
+            DEFAULT_RATES[backend] = config.getfloat('http', f'{backend}_rate')
+    if config.has_option('http', 'max_retries'):
+        retry_policy.max_retries = config.getint('http', 'max_retries')
+    DEFAULT_TIMEOUT = (config.getfloat('http', 'connect_timeout', fallback=DEFAULT_TIMEOUT[0]),
+                       config.getfloat('http', 'read_timeout', fallback=DEFAULT_TIMEOUT[1]))
+
+    with _buckets_lock:
+        _buckets.clear()
+
+
+def set_rate(backend, rate):
+    """
+    Fija la tasa máxima por host de un backend (0 = sin límite) y descarta los limitadores
+    ya creados para que se apliquen con la nueva tasa.
+    """
+    DEFAULT_RATES[backend] = rate
+    with _buckets_lock:
+        _buckets.clear()
+
+
+def close_sessions():
+    """Cierra todas las sesiones abiertas y libera sus conexiones."""
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
@@ -0,0 +1,173 @@
+import configparser
+import os
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+
+FORMAT_EXTENSIONS = {
+    "png": ".png",
+    "webp": ".webp",
+    "jpeg": ".jpg"
+}
+
+
+def load_image_settings(config_file='config.ini'):
+    """
+    Lee la sección opcional [images] del archivo INI.
+
+        [images]
+        enabled = true
+        format = webp        ; png, webp o jpeg
+        quality = 80         ; solo webp/jpeg
+        max_width = 1600     ; 0 = sin reducir
+        crop = true          ; recorta los bordes de color uniforme
+
+    :return: Diccionario con las opciones, o None si el procesamiento está desactivado.
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    if not config.getboolean('images', 'enabled', fallback=False):
+        return None
+    return {
+        'image_format': config.get('images', 'format', fallback='png'),
+        'quality': config.getint('images', 'quality', fallback=80),
+        'max_width': config.getint('images', 'max_width', fallback=0),
+        'crop': config.getboolean('images', 'crop', fallback=True)
+    }
+
+
+def border_color(image, min_share=0.5):
+    """
+    Color dominante del borde de la imagen (filas superior e inferior, columnas izquierda y derecha).
+
+    :param image: Imagen RGB.
+    :param min_share: Fracción mínima del borde que debe tener ese color.
+    :return: Color (r, g, b), o None si ningún color domina el borde.
+    """
+    width, height = image.size
+    strips = [
+        image.crop((0, 0, width, 1)),
+        image.crop((0, height - 1, width, height)),
+        image.crop((0, 0, 1, height)),
+        image.crop((width - 1, 0, width, height))
+    ]
+    counts = {}
+    for strip in strips:
+        for count, color in strip.getcolors(strip.width * strip.height):
+            counts[color] = counts.get(color, 0) + count
+    color, count = max(counts.items(), key=lambda item: item[1])
+    if count < min_share * sum(counts.values()):
+        return None
+    return color
+
+
+def crop_to_content(image, tolerance=8):
+    """
+    Recorta los márgenes de color uniforme alrededor del contenido (fondo del dashboard).
+
+    El color de fondo es el que domina el borde de la imagen; la esquina superior izquierda
+    no sirve porque suele ser la barra de navegación. Si ningún color domina el borde, la
+    imagen no tiene márgenes uniformes y se devuelve sin recortar.
+    """
+    from PIL import Image, ImageChops
+
+    rgb = image.convert('RGB')
+    color = border_color(rgb)
+    if color is None:
+        return image
+    background = Image.new('RGB', rgb.size, color)
+    difference = ImageChops.difference(rgb, background).convert('L')
+    # Ignorar diferencias mínimas (antialiasing, compresión)
+    mask = difference.point(lambda value: 255 if value > tolerance else 0)
+    box = mask.getbbox()
+    if box is None:
+        return image
+    return image.crop(box)
+
+
+def optimize_image(path, image_format='png', quality=80, max_width=0, crop=True):
+    """
+    Recorta, reduce y vuelve a codificar una imagen. Si cambia el formato, reemplaza el
+    archivo original por el nuevo.
+
+    :param path: Ruta de la imagen.
+    :param image_format: 'png', 'webp' o 'jpeg'.
+    :param quality: Calidad de 1 a 100 para webp/jpeg.
+    :param max_width: Ancho máximo en píxeles; 0 para no reducir.
+    :param crop: Recortar los márgenes de color uniforme.
+    :return: (ruta_final, bytes_antes, bytes_despues)
+    """
+    from PIL import Image
+
+    before = os.path.getsize(path)
+    with Image.open(path) as original:
+        image = original.copy()
+
+    if crop:
+        image = crop_to_content(image)
+
+    if max_width and image.width > max_width:
+        height = round(image.height * max_width / image.width)
+        image = image.resize((max_width, height), Image.LANCZOS)
+
+    target = os.path.splitext(path)[0] + FORMAT_EXTENSIONS[image_format]
+    if image_format == 'png':
+        image.save(target, 'PNG', optimize=True)
+    elif image_format == 'webp':
+        image.save(target, 'WEBP', quality=quality, method=6)
+    else:
+        image.convert('RGB').save(target, 'JPEG', quality=quality, optimize=True, progressive=True)
+
+    if target != path:
+        os.remove(path)
+    return target, before, os.path.getsize(target)
+
+
+def _optimize_image_task(args):
+    path, options = args
+    try:
+        return optimize_image(path, **options)
+    except Exception as e:
+        return path, None, str(e)
+
+
+def optimize_images(folder_path, image_format='png', quality=80, max_width=0, crop=True, max_workers=None):
+    """
+    Procesa en paralelo (procesos) todas las imágenes de una carpeta antes de subirlas a Jira.
+
+    :param folder_path: Carpeta con las capturas.
+    :param max_workers: Procesos a usar; None = número de CPUs.
+    :return: Lista de (ruta_final, bytes_antes, bytes_despues) de las imágenes procesadas.
+    """
+    try:
+        import PIL  # noqa: F401
+    except ImportError:
+        print("Pillow no está instalado, las imágenes se suben sin procesar")
+        return []
+
+    if not folder_path or not os.path.isdir(folder_path):
+        return []
+
+    paths = [os.path.join(folder_path, name) for name in sorted(os.listdir(folder_path))
+             if name.lower().endswith(IMAGE_EXTENSIONS)]
+    if not paths:
+        return []
+
+    # Se importa aquí: cargar multiprocessing solo hace falta si hay imágenes que procesar
+    from concurrent.futures import ProcessPoolExecutor
+
+    options = {'image_format': image_format, 'quality': quality, 'max_width': max_width, 'crop': crop}
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for path, before, after in executor.map(_optimize_image_task, [(path, options) for path in paths]):
+            if before is None:
+                print(f"No se pudo procesar la imagen {path}: {after}")
+                continue
+            results.append((path, before, after))
+            print(f"Imagen {os.path.basename(path)}: {before / 1024:.1f} KB -> {after / 1024:.1f} KB")
+
+    total_before = sum(before for _, before, _ in results)
+    total_after = sum(after for _, _, after in results)
+    if total_before:
+        print(f"Imágenes procesadas: {len(results)}, {total_before / 1024:.1f} KB -> {total_after / 1024:.1f} KB "
+              f"({100 * (1 - total_after / total_before):.0f}% menos)")
+    return results
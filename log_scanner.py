@@ -0,0 +1,72 @@
+import re
+
+SONAR_BASE_URL = "http://sonar.afphabitat.net:9000/dashboard"
+SONAR_URL_PATTERN = re.compile(rb"%s\S+" % re.escape(SONAR_BASE_URL.encode()))
+
+# Longitud máxima de una URL que se arrastra entre bloques antes de descartarla
+MAX_MATCH_LENGTH = 8192
+
+
+def scan_stream(chunks, pattern=SONAR_URL_PATTERN, first_only=True, overlap=len(SONAR_BASE_URL)):
+    """
+    Busca un patrón en un flujo de bloques de bytes sin cargarlo completo en memoria.
+
+    Las coincidencias que quedan cortadas entre dos bloques se completan con el bloque
+    siguiente: se arrastra el final del bloque que aún podría formar parte de una URL.
+
+    :param chunks: Iterable de bloques de bytes (por ejemplo response.iter_content()).
+    :param pattern: Expresión regular compilada sobre bytes.
+    :param first_only: Si es True se detiene en la primera coincidencia.
+    :param overlap: Longitud del prefijo fijo del patrón (una coincidencia cuyo prefijo
+        quedó cortado empieza en los últimos overlap bytes del bloque).
+    :return: Lista de coincidencias decodificadas en orden de aparición.
+    """
+    matches = []
+    carry = b''
+
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer = carry + chunk
+        last_end = 0
+        incomplete = None
+        for match in pattern.finditer(buffer):
+            if match.end() == len(buffer):
+                # Puede continuar en el siguiente bloque
+                incomplete = match.start()
+                break
+            matches.append(match.group().decode('utf-8', errors='replace'))
+            if first_only:
+                return matches
+            last_end = match.end()
+
+        if incomplete is not None:
+            carry = buffer[incomplete:]
+            if len(carry) > MAX_MATCH_LENGTH:
+                carry = b''
+        else:
+            carry = buffer[max(last_end, len(buffer) - overlap):]
+
+    # Coincidencia que llega hasta el final del flujo
+    match = pattern.search(carry)
+    if match:
+        matches.append(match.group().decode('utf-8', errors='replace'))
+
+    return matches[:1] if first_only else matches
+
+
+def scan_log(session, url, pattern=SONAR_URL_PATTERN, first_only=True, chunk_size=64 * 1024):
+    """
+    Descarga un log en streaming y devuelve las coincidencias del patrón.
+
+    La conexión se cierra en cuanto se encuentra la primera coincidencia (si first_only),
+    sin descargar el resto del log.
+
+    :param session: Sesión de requests a utilizar.
+    :param url: URL del log.
+    :return: Lista de coincidencias, o None si el log no existe (código distinto de 200).
+    """
+    with session.get(url, stream=True) as response:
+        if response.status_code != 200:
+            return None
+        return scan_stream(response.iter_content(chunk_size=chunk_size), pattern, first_only)
@@ -1,71 +1,288 @@
+import heapq
+import itertools
+import queue
 import requests
 import time
 import threading
 import xmltodict
-import requests
-import time
-import threading
-from requests.auth import HTTPBasicAuth
+from concurrent.futures import ThreadPoolExecutor
+from http_client import get_session
+from concurrency import DEFAULT_LIMITS, PipelineCancelled
+
+TERMINAL_STATES = ['Failed', 'Successful', 'Error']
+
+# Resultados extra que se piden al listar un plan, por si hubo builds más nuevos que los vigilados
+PLAN_RESULTS_MARGIN = 10
+
+
+def split_result_url(api_url):
+    """
+    Separa una URL de resultado (.../rest/api/latest/result/PROJ-PLAN-12) en la URL del
+    listado de resultados del plan y el número de build.
+
+    :return: (url_del_plan, numero) o (None, None) si la URL no tiene ese formato.
+    """
+    base, _, result_key = api_url.rpartition('/')
+    plan_key, _, number = result_key.rpartition('-')
+    if not base.endswith('/result') or not plan_key or not number.isdigit():
+        return None, None
+    return f"{base}/{plan_key}", int(number)
+
+
+def fetch_build_state(api_url, bamboo_user, bamboo_password):
+    """
+    Consulta el estado de un build en la API de Bamboo (XML).
+
+    :param api_url: URL del resultado (.../rest/api/latest/result/PROJ-PLAN-12).
+    :return: buildState del resultado, o "Error" si la consulta falla.
+    """
+    try:
+        session = get_session('bamboo', auth=(bamboo_user, bamboo_password))
+        response = session.get(api_url)
+        response.raise_for_status()
+        build_info = xmltodict.parse(response.content)
+        return build_info['result']['buildState']
+    except requests.exceptions.RequestException as e:
+        print(f"Error al consultar la API para {api_url}: {e}")
+        return "Error"
+
+
+def fetch_plan_states(plan_url, api_urls, bamboo_user, bamboo_password):
+    """
+    Estado de varios builds de un mismo plan con una sola consulta al listado de
+    resultados del plan (JSON, incluyendo builds en curso).
+
+    :param plan_url: URL del listado de resultados del plan (.../result/PROJ-PLAN).
+    :param api_urls: URLs de resultado de ese plan.
+    :return: Diccionario api_url -> estado de los builds que aparecieron en el listado.
+    """
+    numbers = [split_result_url(api_url)[1] for api_url in api_urls]
+    params = {
+        "expand": "results.result",
+        "includeAllStates": "true",
+        "max-results": max(numbers) - min(numbers) + 1 + PLAN_RESULTS_MARGIN
+    }
+
+    session = get_session('bamboo', auth=(bamboo_user, bamboo_password))
+    response = session.get(f"{plan_url}.json", params=params, headers={"Accept": "application/json"})
+    response.raise_for_status()
+
+    states = {}
+    for result in response.json().get('results', {}).get('result', []):
+        states[result.get('buildResultKey')] = result.get('buildState')
+    return {api_url: states[api_url.rpartition('/')[2]] for api_url in api_urls
+            if states.get(api_url.rpartition('/')[2]) is not None}
+
+
+class BuildPollScheduler:
+    """
+    Planificador único para todos los builds vigilados, de todos los monitores.
+
+    Los builds se agrupan por plan (incluido el plan de rama) entre todos los monitores:
+    en cada vencimiento un grupo se consulta una sola vez y el estado se entrega a cada
+    monitor que vigila esos builds. Un build vigilado por varios monitores (por ejemplo,
+    dos issues con el mismo PR) se consulta una vez; varios builds de un mismo plan se
+    consultan con un solo listado. La API de Bamboo no permite listar resultados de
+    planes de rama distintos en una consulta, así que cada plan de rama es un grupo.
+
+    Un solo hilo mantiene una cola de prioridad con el próximo vencimiento de cada grupo
+    y entrega la consulta a un pool pequeño de hilos que comparte la sesión keep-alive
+    de Bamboo. No hay un hilo por build ni esperas ociosas por build.
+    """
+
+    def __init__(self, max_workers=4):
+        """
+        :param max_workers: Consultas a Bamboo que pueden estar en curso a la vez.
+        """
+        self._heap = []  # (vencimiento, secuencia, grupo)
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._watchers = {}  # grupo -> {api_url: [monitores]}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bamboo-poll')
+        self._thread = None
+
+    def watch(self, monitor, api_urls):
+        """Agrega builds de un monitor a sus grupos y programa los grupos nuevos de inmediato."""
+        with self._condition:
+            for api_url in api_urls:
+                plan_url, _ = split_result_url(api_url)
+                # Las URLs sin formato de resultado forman un grupo propio
+                group = plan_url or api_url
+                if group not in self._watchers:
+                    self._watchers[group] = {}
+                    self._push(group, 0)
+                self._watchers[group].setdefault(api_url, []).append(monitor)
+
+    def _push(self, group, delay):
+        heapq.heappush(self._heap, (time.monotonic() + delay, next(self._sequence), group))
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='bamboo-scheduler', daemon=True)
+            self._thread.start()
+        self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._heap:
+                    self._condition.wait()
+                due, _, group = self._heap[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    # Despertar solo cuando vence la próxima consulta o llega una nueva
+                    self._condition.wait(timeout=delay)
+                    continue
+                heapq.heappop(self._heap)
+            self._executor.submit(self._poll, group)
+
+    def _active(self, group):
+        """Builds del grupo que algún monitor no cancelado aún espera; descarta los demás."""
+        watchers = self._watchers.get(group, {})
+        for api_url in list(watchers):
+            monitors = [monitor for monitor in watchers[api_url] if monitor.is_pending(api_url)]
+            if monitors:
+                watchers[api_url] = monitors
+            else:
+                del watchers[api_url]
+        return {api_url: list(monitors) for api_url, monitors in watchers.items()}
+
+    def _poll(self, group):
+        """
+        Consulta una vez los builds pendientes de un grupo y, si alguno no termina, lo vuelve a programar.
+
+        :param group: URL del plan (o del build, si no se pudo agrupar).
+        """
+        with self._condition:
+            targets = self._active(group)
+        if targets:
+            # Todos los monitores usan la cuenta de Bamboo del pipeline
+            first = next(iter(targets.values()))[0]
+            credentials = (first.bamboo_user, first.bamboo_password)
+            api_urls = list(targets)
+            try:
+                states = {}
+                if len(api_urls) > 1:
+                    try:
+                        states = fetch_plan_states(group, api_urls, *credentials)
+                    except (requests.exceptions.RequestException, ValueError) as e:
+                        print(f"Error al consultar los resultados del plan {group}, se consultará cada build: {e}")
+                for api_url in api_urls:
+                    if api_url not in states:
+                        states[api_url] = fetch_build_state(api_url, *credentials)
+            except Exception as e:
+                print(f"Error inesperado al procesar los builds de {group}: {e}")
+                states = {api_url: "Error" for api_url in api_urls}
+
+            for api_url, build_state in states.items():
+                print(f"Estado actual del build en {api_url}: {build_state}")
+                for monitor in targets[api_url]:
+                    monitor._set_state(api_url, build_state)
+
+        with self._condition:
+            remaining = self._active(group)
+            if remaining:
+                interval = min(monitor.check_interval for monitors in remaining.values() for monitor in monitors)
+                self._push(group, interval)
+            else:
+                del self._watchers[group]
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Devuelve el planificador compartido, creándolo la primera vez."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = BuildPollScheduler(max_workers=DEFAULT_LIMITS['bamboo'])
+    return _scheduler
+
 
 class BambooBuildMonitor:
-    def __init__(self, api_urls, bamboo_user, bamboo_passowrd,  check_interval=10):
+    def __init__(self, api_urls, bamboo_user, bamboo_passowrd,  check_interval=10, on_build_complete=None, cancel_event=None):
         """
         Inicializa el monitor de construcción de Bamboo para una lista de URLs.
-        
+
         :param api_urls: Lista de URLs de la API de Bamboo para monitorear.
         :param check_interval: Intervalo de tiempo en segundos entre cada consulta.
+        :param on_build_complete: Función opcional on_build_complete(api_url, build_state) que se
+            llama en cuanto cada build llega a un estado final. Se ejecuta en un hilo del
+            planificador, así que debe ser rápida; para trabajo pesado usar as_completed().
+        :param cancel_event: threading.Event opcional; al activarse se dejan de consultar los
+            builds y as_completed()/wait_for_completion() lanzan PipelineCancelled.
         """
         self.bamboo_user = bamboo_user
         self.bamboo_password = bamboo_passowrd
         self.api_urls = api_urls
         self.check_interval = check_interval
         self.build_states = {url: None for url in api_urls}
-        self.monitor_threads = []
+        self._lock = threading.Lock()
+        self._pending = set(self.build_states)
+        self._completed = threading.Event()
+        self.on_build_complete = on_build_complete
+        self.cancel_event = cancel_event
+        self._finished = queue.Queue()  # (api_url, estado) en orden de finalización
 
-    def _check_build_state(self, api_url):
-        """
-        Realiza la consulta a la API de Bamboo y actualiza el estado de la construcción.
-        
-        :param api_url: URL específica del plan de Bamboo.
-        """
-        try:
-            response = requests.get(api_url, auth=HTTPBasicAuth(self.bamboo_user, self.bamboo_password))
-            response.raise_for_status()
-            build_info = xmltodict.parse(response.content)
-            build_state = build_info['result']['buildState']
+    def _set_state(self, api_url, build_state):
+        finished = False
+        with self._lock:
             self.build_states[api_url] = build_state
-            print(f"Estado actual del build en {api_url}: {build_state}")
-        except requests.exceptions.RequestException as e:
-            print(f"Error al consultar la API para {api_url}: {e}")
-            self.build_states[api_url] = "Error"
+            if build_state in TERMINAL_STATES and api_url in self._pending:
+                self._pending.discard(api_url)
+                finished = True
+                if not self._pending:
+                    self._completed.set()
 
-    def _monitor_build(self, api_url):
+        if finished:
+            self._finished.put((api_url, build_state))
+            if self.on_build_complete is not None:
+                try:
+                    self.on_build_complete(api_url, build_state)
+                except Exception as e:
+                    print(f"Error en on_build_complete para {api_url}: {e}")
+
+    def cancelled(self):
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def is_pending(self, api_url):
+        """True si el build aún no llega a un estado final y el monitor no fue cancelado."""
+        with self._lock:
+            pending = api_url in self._pending
+        return pending and not self.cancelled()
+
+    def start_monitoring(self):
         """
-        Monitorea el estado de la construcción hasta que sea 'Failed' o 'Successful'.
-        
-        :param api_url: URL específica del plan de Bamboo.
+        Inicia la monitorización de todos los builds en el planificador compartido.
         """
-        while self.build_states[api_url] not in ['Failed', 'Successful', 'Error']:
-            self._check_build_state(api_url)
-            if self.build_states[api_url] not in ['Failed', 'Successful', 'Error']:
-                time.sleep(self.check_interval)
+        if not self._pending:
+            self._completed.set()
+        get_scheduler().watch(self, list(self._pending))
+        for api_url in self.build_states:
+            print(f"Monitoreo iniciado para {api_url}")
 
-    def start_monitoring(self):
+    def as_completed(self):
         """
-        Inicia la monitorización de todos los builds en hilos separados.
+        Entrega (api_url, estado) de cada build a medida que llega a un estado final,
+        sin esperar a que terminen los demás.
         """
-        for api_url in self.api_urls:
-            monitor_thread = threading.Thread(target=self._monitor_build, args=(api_url,))
-            self.monitor_threads.append(monitor_thread)
-            monitor_thread.start()
-            print(f"Monitoreo iniciado para {api_url} en hilo {monitor_thread.name}")
+        for _ in range(len(self.build_states)):
+            while True:
+                try:
+                    # Espera con timeout para que Ctrl+C siga funcionando (también en Windows)
+                    yield self._finished.get(timeout=1)
+                    break
+                except queue.Empty:
+                    if self.cancelled():
+                        raise PipelineCancelled("Monitoreo cancelado")
 
     def wait_for_completion(self):
         """
-        Espera a que todos los hilos de monitorización terminen.
+        Espera a que todos los builds lleguen a un estado final.
         """
-        for monitor_thread in self.monitor_threads:
-            monitor_thread.join()
+        # Espera con timeout para que Ctrl+C siga funcionando (también en Windows)
+        while not self._completed.wait(timeout=1):
+            if self.cancelled():
+                raise PipelineCancelled("Monitoreo cancelado")
 
-        
         return self.build_states
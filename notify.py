@@ -1,19 +1,250 @@
-from win10toast import ToastNotifier
+import atexit
+import configparser
 import os
+import queue
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
 
-# Inicialización del notificador
-toaster = ToastNotifier()
+ICONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "icons")
 
 # Diccionario de iconos para diferentes tipos de notificación
 ICON_PATHS = {
-    "success": "icons/success.ico",   # Verde
-    "error": "icons/error.ico",       # Rojo
-    "info": "icons/info.ico"          # Azul
+    "success": os.path.join(ICONS_DIR, "success.ico"),   # Verde
+    "error": os.path.join(ICONS_DIR, "error.ico"),       # Rojo
+    "info": os.path.join(ICONS_DIR, "info.ico")          # Azul
 }
 
+# Prioridad de cada tipo al resumir varias notificaciones en una
+SEVERITY = {"info": 0, "success": 1, "error": 2}
+
+
+class StdoutBackend:
+    """Escribe las notificaciones en la salida estándar."""
+
+    def send(self, title, message, notification_type, icon_path):
+        print(f"[{title}] {message}")
+
+
+class LogBackend:
+    """Agrega las notificaciones a un archivo de texto."""
+
+    def __init__(self, path='notifications.log'):
+        self.path = path
+
+    def send(self, title, message, notification_type, icon_path):
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(f"{timestamp} {notification_type.upper()} {title}: {message}\n")
+
+
+class DesktopBackend:
+    """
+    Notificación de escritorio del sistema operativo: win10toast en Windows, osascript en
+    macOS y notify-send en Linux. Si no hay ninguno disponible se usa la salida estándar.
+    """
+
+    def __init__(self, duration=5):
+        """
+        :param duration: Segundos que se muestra la notificación en Windows.
+        """
+        self.duration = duration
+        self._toaster = None
+        self._fallback = StdoutBackend()
+
+    def _windows_toaster(self):
+        if self._toaster is None:
+            try:
+                from win10toast import ToastNotifier
+            except ImportError:
+                return None
+            self._toaster = ToastNotifier()
+        return self._toaster
+
+    def send(self, title, message, notification_type, icon_path):
+        if sys.platform == 'win32':
+            toaster = self._windows_toaster()
+            if toaster is not None:
+                # Bloquea solo al hilo del despachador, nunca al pipeline
+                toaster.show_toast(title=title, msg=message, icon_path=icon_path, duration=self.duration)
+                return
+        elif sys.platform == 'darwin' and shutil.which('osascript'):
+            script = f"display notification {_applescript_string(message)} with title {_applescript_string(title)}"
+            subprocess.run(['osascript', '-e', script], check=False, timeout=10)
+            return
+        elif shutil.which('notify-send'):
+            command = ['notify-send', title, message]
+            if icon_path:
+                command[1:1] = ['--icon', icon_path]
+            subprocess.run(command, check=False, timeout=10)
+            return
+        self._fallback.send(title, message, notification_type, icon_path)
+
+
+def _applescript_string(text):
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+BACKENDS = {
+    "stdout": StdoutBackend,
+    "log": LogBackend,
+    "desktop": DesktopBackend
+}
+
+
+class NotificationDispatcher:
+    """
+    Envía las notificaciones desde un hilo en segundo plano para que el pipeline nunca
+    espere por ellas.
+
+    Las notificaciones que llegan dentro de `coalesce_window` segundos se agrupan en un solo
+    resumen (por ejemplo, el fin de muchos issues procesados en paralelo). Un error en un
+    backend se informa por consola y no afecta a los demás ni al pipeline.
+    """
+
+    def __init__(self, backends=None, coalesce_window=2.0, max_lines=10):
+        """
+        :param backends: Backends con el método send(title, message, notification_type, icon_path).
+        :param coalesce_window: Segundos que se esperan notificaciones adicionales antes de enviar.
+        :param max_lines: Mensajes que se listan como máximo en un resumen.
+        """
+        self.backends = list(backends) if backends else [DesktopBackend()]
+        self.coalesce_window = coalesce_window
+        self.max_lines = max_lines
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def notify(self, message, notification_type="info"):
+        """Encola una notificación y retorna de inmediato."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='notification-dispatcher', daemon=True)
+                self._thread.start()
+        self._queue.put((message, notification_type))
+
+    def flush(self, timeout=None):
+        """
+        Espera a que se envíen las notificaciones pendientes.
+
+        :param timeout: Segundos máximos de espera, o None para esperar sin límite.
+        :return: True si no quedaron notificaciones pendientes.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _collect(self):
+        """Espera una notificación y agrupa las que lleguen dentro de la ventana."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.coalesce_window
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _summarize(self, batch):
+        """Convierte un grupo de notificaciones en (título, mensaje, tipo)."""
+        notification_type = max((item_type for _, item_type in batch), key=SEVERITY.get)
+        if len(batch) == 1:
+            message = batch[0][0]
+            return f"Notificación: {notification_type.capitalize()}", message, notification_type
+
+        # Mensajes repetidos se cuentan una vez con su número de ocurrencias
+        counts = {}
+        for message, _ in batch:
+            counts[message] = counts.get(message, 0) + 1
+        lines = [f"{message} (x{count})" if count > 1 else message for message, count in counts.items()]
+        if len(lines) > self.max_lines:
+            lines = lines[:self.max_lines] + [f"... y {len(lines) - self.max_lines} más"]
+        return f"{len(batch)} notificaciones", "\n".join(lines), notification_type
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                title, message, notification_type = self._summarize(batch)
+                icon_path = ICON_PATHS.get(notification_type)
+                if icon_path and not os.path.exists(icon_path):
+                    icon_path = None
+                for backend in self.backends:
+                    try:
+                        backend.send(title, message, notification_type, icon_path)
+                    except Exception as e:
+                        print(f"Error mostrando la notificación con {type(backend).__name__}: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def configure_notifications(config_file='config.ini'):
+    """
+    Crea el despachador de notificaciones según la sección opcional [notifications].
+
+        [notifications]
+        backends = desktop, log    ; desktop, stdout y/o log
+        coalesce = 2               ; segundos para agrupar notificaciones en un resumen
+        log_path = notifications.log
+
+    :return: NotificationDispatcher configurado.
+    """
+    global _dispatcher
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    names = [name.strip() for name in config.get('notifications', 'backends', fallback='desktop').split(',') if name.strip()]
+    backends = []
+    for name in names:
+        if name not in BACKENDS:
+            print(f"Backend de notificaciones desconocido: {name}")
+        elif name == 'log':
+            backends.append(LogBackend(config.get('notifications', 'log_path', fallback='notifications.log')))
+        else:
+            backends.append(BACKENDS[name]())
+    dispatcher = NotificationDispatcher(backends, coalesce_window=config.getfloat('notifications', 'coalesce', fallback=2.0))
+    with _dispatcher_lock:
+        previous, _dispatcher = _dispatcher, dispatcher
+    if previous is not None:
+        previous.flush(timeout=10)
+    return dispatcher
+
+
+def get_dispatcher():
+    """Devuelve el despachador actual, creándolo con los backends por defecto si no existe."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = NotificationDispatcher()
+        return _dispatcher
+
+
+@atexit.register
+def _flush_on_exit():
+    # El hilo del despachador es daemon: al salir se da un margen para enviar lo pendiente
+    if _dispatcher is not None:
+        _dispatcher.flush(timeout=10)
+
+
 def show_notification(message: str, notification_type: str = "info"):
     """
-    Muestra una notificación en Windows con base en el tipo de notificación.
+    Muestra una notificación con base en el tipo de notificación, sin bloquear: se encola
+    y la envía el despachador en segundo plano.
 
     Parámetros:
     message (str): El mensaje que se mostrará en la notificación.
@@ -22,20 +253,8 @@ def show_notification(message: str, notification_type: str = "info"):
     if notification_type not in ICON_PATHS:
         raise ValueError(f"Tipo de notificación '{notification_type}' no es válido. "
                          f"Debe ser 'success', 'error', o 'info'.")
-    
-    icon_path = ICON_PATHS[notification_type]
-    
-    # Verifica si el archivo de ícono existe
-    if not os.path.exists(icon_path):
-        raise FileNotFoundError(f"El archivo de ícono '{icon_path}' no se encontró.")
-
-    # Muestra la notificación con el ícono adecuado
-    toaster.show_toast(
-        title=f"Notificación: {notification_type.capitalize()}",
-        msg=message,
-        icon_path=icon_path,
-        duration=5  # Duración de 5 segundos
-    )
+
+    get_dispatcher().notify(message, notification_type)
 
 def main():
     """
@@ -44,13 +263,13 @@ def main():
     try:
         # Ejemplo de notificación de éxito
         show_notification("Operación completada con éxito.", "success")
-        
+
         # Ejemplo de notificación de error
         show_notification("Ha ocurrido un error crítico.", "error")
-        
+
         # Ejemplo de notificación informativa
         show_notification("Este es un mensaje de información.", "info")
-    
+
     except Exception as e:
         print(f"Error mostrando la notificación: {e}")
 
@@ -0,0 +1,134 @@
+import configparser
+import json
+import os
+from datetime import datetime
+
+
+def load_daemon_settings(config_file='config.ini'):
+    """
+    Lee la sección opcional [daemon] del archivo INI.
+
+        [daemon]
+        interval = 300                      ; segundos entre consultas
+        state_path = .cache/poll_state.json
+
+    :return: (interval, state_path)
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    interval = config.getint('daemon', 'interval', fallback=300)
+    state_path = config.get('daemon', 'state_path', fallback='.cache/poll_state.json')
+    return interval, state_path
+
+
+def jira_minute(updated):
+    """
+    Convierte el campo updated de Jira ("2024-05-20T10:15:42.123-0400") al formato de
+    fecha de JQL con precisión de minuto ("2024-05-20 10:15").
+
+    Se conserva la hora tal como la entrega Jira (zona horaria del usuario), que es la
+    misma con la que JQL interpreta las fechas.
+    """
+    return datetime.strptime(updated[:16], '%Y-%m-%dT%H:%M').strftime('%Y-%m-%d %H:%M')
+
+
+def parse_jira_datetime(value):
+    """Convierte una fecha de Jira ("2024-05-20T10:15:42.123-0400") a datetime con zona horaria."""
+    return datetime.strptime(value, '%Y-%m-%dT%H:%M:%S.%f%z')
+
+
+class PollState:
+    """
+    Estado persistente del modo daemon: marca de agua de la última consulta, fecha de
+    actualización de cada issue ya procesado e issues que fallaron y deben reintentarse.
+
+    Como JQL solo permite precisión de minuto, cada consulta vuelve a traer el minuto de
+    la marca de agua; los issues cuya fecha de actualización no cambió se descartan. La
+    marca de agua solo debe avanzar tras una consulta completa.
+    """
+
+    def __init__(self, path='.cache/poll_state.json'):
+        """
+        :param path: Archivo JSON donde persistir el estado.
+        """
+        self.path = path
+        self.watermark = None
+        self.seen = {}       # clave -> updated procesado
+        self.pending = []    # claves a reintentar aunque no hayan cambiado
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+                self.watermark = data.get('watermark')
+                self.seen = data.get('seen', {})
+                self.pending = data.get('pending', [])
+            except (OSError, ValueError) as err:
+                print(f"No se pudo leer el estado {path}: {err}")
+
+    def build_jql(self, base_jql):
+        """
+        Agrega a la consulta base el filtro por fecha de actualización y los issues pendientes.
+
+        Los resultados se ordenan por fecha de actualización ascendente: si la consulta se
+        interrumpe, los issues que no alcanzaron a llegar son posteriores a los recibidos.
+        """
+        order = ' ORDER BY updated ASC'
+        if not self.watermark:
+            # Primera consulta: todos los issues elegibles
+            return base_jql + order
+        filters = [f'updated >= "{self.watermark}"']
+        if self.pending:
+            filters.append(f"issue in ({','.join(self.pending)})")
+        return f"{base_jql} and ({' or '.join(filters)}){order}"
+
+    def is_new(self, issue):
+        """True si el issue no se ha procesado con su fecha de actualización actual."""
+        key = issue.get('key')
+        if key in self.pending:
+            return True
+        updated = issue.get('fields', {}).get('updated')
+        return updated is None or self.seen.get(key) != updated
+
+    def mark_done(self, key, updated):
+        """Registra el issue como procesado con la fecha de actualización indicada."""
+        if key in self.pending:
+            self.pending.remove(key)
+        if updated:
+            self.seen[key] = updated
+        self.save()
+
+    def mark_failed(self, key):
+        """Deja el issue pendiente para reintentarlo en la siguiente consulta."""
+        if key not in self.pending:
+            self.pending.append(key)
+        self.save()
+
+    def advance(self, watermark, returned_keys=None):
+        """
+        Mueve la marca de agua (solo hacia adelante) y olvida los issues que quedaron antes de ella.
+
+        :param watermark: Fecha en formato JQL ("yyyy-MM-dd HH:mm").
+        :param returned_keys: Claves que devolvió la consulta; los pendientes que ya no
+            aparecen (por ejemplo, porque cambiaron de estado) dejan de reintentarse.
+        """
+        if returned_keys is not None:
+            self.pending = [key for key in self.pending if key in returned_keys]
+        if watermark and (self.watermark is None or watermark > self.watermark):
+            self.watermark = watermark
+            self.seen = {key: updated for key, updated in self.seen.items() if jira_minute(updated) >= watermark}
+        self.save()
+
+    def save(self):
+        """Escribe el estado en disco de forma atómica (archivo temporal + reemplazo)."""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump({'watermark': self.watermark, 'seen': self.seen, 'pending': self.pending}, file)
+            os.replace(temp_path, self.path)
+        except OSError as err:
+            print(f"No se pudo guardar el estado {self.path}: {err}")
@@ -1,68 +1,10 @@
 import xmltodict
 import configparser
-import requests
-from requests.auth import HTTPBasicAuth
+from http_client import get_session
 from requests.exceptions import RequestException
-import re
-import time
-import os
-import random
-import string
-import time
-from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service
-from selenium.webdriver.edge.options import Options
-
-import tempfile
-
-def generate_random_folder_name(length=8):
-    """Genera un nombre aleatorio para la carpeta."""
-    return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
-
-def capture_screenshots_with_cookies(edge_driver_path, edge_user_data_dir, edge_profile_directory, urls):
-    """
-    Abre cada URL en Microsoft Edge utilizando el perfil de usuario para cargar las cookies.
-    Toma capturas de pantalla de las URLs después de iniciar sesión automáticamente mediante las cookies.
-
-    :param edge_driver_path: Ruta al archivo ejecutable de EdgeDriver.
-    :param edge_user_data_dir: Ruta al directorio de datos del usuario de Edge.
-    :param edge_profile_directory: Nombre del directorio del perfil de usuario en Edge.
-    :param urls: Lista de URLs para abrir y capturar.
-    """
-    # Directorio temporal para almacenar las capturas de pantalla
-    temp_dir = os.path.join(tempfile.gettempdir(), generate_random_folder_name())
-    os.makedirs(temp_dir, exist_ok=True)
-
-    edge_options = Options()
-    edge_options.add_argument(f'user-data-dir={edge_user_data_dir}')
-    edge_options.add_argument(f'profile-directory={edge_profile_directory}')
-    edge_options.add_argument('--headless')  # Ejecutar en modo headless (sin interfaz gráfica)
-
-    service = Service(executable_path=edge_driver_path)
-
-    try:
-        driver = webdriver.Edge(service=service, options=edge_options)
-    except Exception as e:
-        print(f"Error al iniciar EdgeDriver: {e}")
-        return
-
-    for url in urls:
-        driver.get(url)
-        print(f"Abriendo {url} con sesión existente")
-        time.sleep(10)  # Esperar para que la página cargue completamente
-
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        screenshot_filename = f"screenshot_{timestamp}.png"
-        screenshot_path = os.path.join(temp_dir, screenshot_filename)
-
-        driver.save_screenshot(screenshot_path)
-        print(f"Captura de pantalla guardada en: {screenshot_path}")
-
-        time.sleep(2)
-
-    driver.quit()
+from concurrent.futures import ThreadPoolExecutor
+from log_scanner import scan_log
+from utils import capture_screenshots_with_cookies
 
 def load_config(config_file='config.ini'):
     """Carga la configuración desde un archivo INI."""
@@ -92,27 +34,29 @@ def xml_to_json(xml_data):
         return f'Error: {e}'
     
 def get_sonar_urls(results_plan, bamboo_user, bamboo_password):
-    sonar_base_url="http://sonar.afphabitat.net:9000/dashboard"
-    sonar_urls = []
-    for result in results_plan:
+    session = get_session('bamboo', auth=(bamboo_user, bamboo_password))
+
+    def scan(result):
         descript = result.split('-')
         codi = f'{descript[0]}-{descript[1]}'
         num = f'{descript[2]}'
         url = f'http://bamboo.afphabitat.net:8085/download/{codi}-SON/build_logs/{codi}-SON-{num}.log'
         try:
-            response = requests.get(url, auth=HTTPBasicAuth(bamboo_user, bamboo_password))
-            if response.status_code == 200:
-                # Buscar las URLs que comienzan con la base de Sonar
-                sonar_urls_in_log = re.findall(rf"{re.escape(sonar_base_url)}\S+", response.text)
-                
-                # Agregar las URLs encontradas a la lista general
-                sonar_urls.extend(sonar_urls_in_log)
-            else:
+            # Leer el log en streaming hasta encontrar la URL de Sonar
+            sonar_urls_in_log = scan_log(session, url)
+            if sonar_urls_in_log is None:
                 print(f"No se encontro job sonar para el resultado {url} correspondiente a la ejecion {result}")
+                return []
+            return sonar_urls_in_log
         except RequestException as e:
             print(f"Excepción durante la solicitud HTTP para {url}: {e}")
-    return sonar_urls
+            return []
 
+    sonar_urls = []
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        for sonar_urls_in_log in executor.map(scan, results_plan):
+            sonar_urls.extend(sonar_urls_in_log)
+    return sonar_urls
 
 jira_url, jira_token, jira_email, bitbucket_token, bamboo_user, bamboo_password, edge_driver_path, edge_user_data_dir, edge_profile_directory = load_config()
 results_plan = ["SBPP-PADNBQA1-11",
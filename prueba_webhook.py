@@ -0,0 +1,89 @@
+"""
+Prueba del modo webhook: envía payloads grabados de Jira y Bitbucket a un listener local.
+
+Sin argumentos levanta un WebhookListener propio (sin procesar issues, solo imprime las
+claves que entregaría) y le envía una ráfaga de eventos para verificar el agrupamiento.
+Con una URL, envía los eventos a un listener ya en ejecución (python Main.py --webhook).
+También acepta archivos JSON grabados: el tipo se deduce de su contenido.
+
+Uso:
+    python prueba_webhook.py
+    python prueba_webhook.py http://127.0.0.1:8090 [payload.json ...]
+"""
+import json
+import sys
+import time
+import requests
+from webhook import WebhookListener
+
+# Payloads grabados, reducidos a los campos que usa el listener
+JIRA_ISSUE_UPDATED = {
+    "webhookEvent": "jira:issue_updated",
+    "issue_event_type_name": "issue_generic",
+    "user": {"accountId": "5b10ac8d82e05b22cc7d4ef5", "emailAddress": "dev@afphabitat.cl"},
+    "issue": {"key": "QAT-101", "fields": {"status": {"name": "Por Hacer QAT"}}},
+    "changelog": {"items": [{"field": "status", "fromString": "En Desarrollo", "toString": "Por Hacer QAT"}]}
+}
+
+JIRA_ATTACHMENT_ADDED = {
+    "webhookEvent": "jira:issue_updated",
+    "user": {"accountId": "5b10ac8d82e05b22cc7d4ef5", "emailAddress": "dev@afphabitat.cl"},
+    "issue": {"key": "QAT-102"},
+    "changelog": {"items": [{"field": "Attachment", "toString": "captura_1.png"}]}
+}
+
+BITBUCKET_PR_UPDATED = {
+    "pullrequest": {
+        "id": 42,
+        "title": "QAT-101 Ajuste de validaciones",
+        "state": "OPEN",
+        "description": "Relacionado con QAT-103. Archivos en UTF-8, firma SHA-256",
+        "source": {"branch": {"name": "feature/QAT-101-validaciones"}, "commit": {"hash": "9f1c2ab"}}
+    }
+}
+
+
+def post_payload(base_url, payload):
+    """Envía un payload a la ruta que le corresponde. Devuelve la respuesta."""
+    if 'pullrequest' in payload:
+        return requests.post(f"{base_url}/webhook/bitbucket", json=payload,
+                             headers={"X-Event-Key": "pullrequest:updated"})
+    return requests.post(f"{base_url}/webhook/jira", json=payload)
+
+
+def main():
+    if len(sys.argv) > 1:
+        base_url = sys.argv[1].rstrip('/')
+        payloads = [JIRA_ISSUE_UPDATED, BITBUCKET_PR_UPDATED]
+        if len(sys.argv) > 2:
+            payloads = []
+            for path in sys.argv[2:]:
+                with open(path, 'r', encoding='utf-8') as file:
+                    payloads.append(json.load(file))
+        for payload in payloads:
+            response = post_payload(base_url, payload)
+            print(f"{response.status_code} {response.text}")
+        return
+
+    flushes = []
+    listener = WebhookListener(lambda keys: flushes.append((time.perf_counter(), keys)), port=0, debounce=1, max_wait=5,
+                               projects=['QAT']).start()
+    try:
+        start = time.perf_counter()
+        # Ráfaga: varios eventos del mismo issue y un adjunto que debe ignorarse
+        for payload in [JIRA_ISSUE_UPDATED, BITBUCKET_PR_UPDATED, JIRA_ISSUE_UPDATED, JIRA_ATTACHMENT_ADDED]:
+            response = post_payload(listener.url, payload)
+            print(f"{response.status_code} claves: {response.text or '-'}")
+        time.sleep(2)
+    finally:
+        listener.stop()
+
+    for flushed_at, keys in flushes:
+        print(f"Lote entregado a los {flushed_at - start:.2f} s: {', '.join(keys)}")
+    if [keys for _, keys in flushes] != [['QAT-101', 'QAT-103']]:
+        print("Resultado inesperado")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
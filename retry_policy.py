@@ -0,0 +1,134 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import requests
+
+# Métodos que pueden repetirse sin efectos secundarios
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+# Respuestas que indican saturación o falla transitoria del servidor
+RETRY_STATUSES = {429, 502, 503, 504}
+
+# Respuestas en las que el servidor rechazó la petición sin procesarla: se pueden repetir
+# incluso para un POST si quien llama lo permite (retry_on_reject=True)
+REJECT_STATUSES = {429, 503}
+
+# Peticiones por segundo permitidas por host de cada backend (0 = sin límite).
+# Sin límite por defecto: solo se frena ante un 429/Retry-After, salvo que se configure
+# [http] <backend>_rate con el límite real del servidor.
+DEFAULT_RATES = {
+    "jira": 0,
+    "bitbucket": 0,
+    "bamboo": 0,
+    "sonar": 0
+}
+
+
+class TokenBucket:
+    """
+    Limitador de tasa tipo token bucket, seguro entre hilos.
+
+    Permite ráfagas de hasta `burst` peticiones y luego `rate` peticiones por segundo.
+    Con pause() todas las peticiones al host esperan (por ejemplo tras un 429 con Retry-After).
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.burst = burst or max(1, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Espera hasta que haya un token disponible y lo consume."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif not self.rate:
+                    # Sin límite de tasa: solo se respetan las pausas por 429
+                    return
+                else:
+                    self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Detiene las peticiones al host durante `seconds` segundos."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def parse_retry_after(value):
+    """
+    Interpreta el encabezado Retry-After (segundos o fecha HTTP).
+
+    :return: Segundos a esperar, o None si no se puede interpretar.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+class RetryPolicy:
+    """
+    Decide si una petición fallida se repite y cuánto esperar antes (backoff exponencial con jitter).
+    """
+
+    def __init__(self, max_retries=4, backoff=0.5, max_backoff=30):
+        """
+        :param max_retries: Reintentos máximos por petición.
+        :param backoff: Espera base en segundos (se duplica en cada intento).
+        :param max_backoff: Espera máxima en segundos.
+        """
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def should_retry(self, method, attempt, response=None, error=None, retry_on_reject=False):
+        """
+        :param method: Método HTTP de la petición.
+        :param attempt: Número de reintentos ya hechos.
+        :param response: Respuesta recibida, si la hubo.
+        :param error: Excepción de requests, si la petición no obtuvo respuesta.
+        :param retry_on_reject: Permite repetir métodos no idempotentes cuando el servidor
+            la rechazó sin procesarla (429/503) o no se llegó a conectar.
+        """
+        if attempt >= self.max_retries:
+            return False
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+
+        if response is not None:
+            if idempotent:
+                return response.status_code in RETRY_STATUSES
+            return retry_on_reject and response.status_code in REJECT_STATUSES
+
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            # No hubo conexión: la petición no llegó al servidor
+            return idempotent or retry_on_reject
+        if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+            return idempotent
+        return False
+
+    def delay(self, attempt, response=None):
+        """Segundos a esperar antes del reintento; respeta Retry-After si viene en la respuesta."""
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, self.max_backoff * 4)
+        # Full jitter: espera aleatoria entre 0 y el backoff exponencial
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
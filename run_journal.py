@@ -0,0 +1,95 @@
+import configparser
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class RunJournal:
+    """
+    Bitácora persistente (SQLite) del avance de cada issue por etapa.
+
+    Si una ejecución se interrumpe, la siguiente consulta la bitácora para saltar las etapas
+    ya terminadas (PRs resueltos, ramas habilitadas, builds encolados, URLs Sonar, capturas
+    y adjuntos) y volver a vigilar los builds que quedaron en curso en lugar de encolarlos
+    otra vez. Cuando un issue termina completo se borran sus entradas.
+    """
+
+    def __init__(self, path='.cache/run_journal.db'):
+        """
+        :param path: Archivo SQLite de la bitácora.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._closed = False
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS stages ("
+                " issue_key TEXT NOT NULL,"
+                " stage TEXT NOT NULL,"
+                " data TEXT,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (issue_key, stage))"
+            )
+
+    def get(self, issue_key, stage, default=None):
+        """Devuelve los datos guardados de una etapa, o default si aún no se completó."""
+        with self._lock:
+            if self._closed:
+                return default
+            row = self._connection.execute(
+                "SELECT data FROM stages WHERE issue_key = ? AND stage = ?", (issue_key, stage)).fetchone()
+        if row is None:
+            return default
+        return json.loads(row[0])
+
+    def put(self, issue_key, stage, data=True):
+        """Marca una etapa como completada guardando sus datos (deben ser serializables en JSON)."""
+        with self._lock:
+            if self._closed:
+                # Un issue que no se detuvo a tiempo tras una cancelación: la etapa se repetirá al reanudar
+                print(f"Bitácora cerrada, no se registró la etapa {stage} de {issue_key}")
+                return
+            with self._connection:
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO stages (issue_key, stage, data, updated_at) VALUES (?, ?, ?, ?)",
+                    (issue_key, stage, json.dumps(data), time.time()))
+
+    def clear(self, issue_key=None):
+        """Borra las etapas de un issue, o toda la bitácora si no se indica ninguno."""
+        with self._lock:
+            if self._closed:
+                return
+            with self._connection:
+                if issue_key is None:
+                    self._connection.execute("DELETE FROM stages")
+                else:
+                    self._connection.execute("DELETE FROM stages WHERE issue_key = ?", (issue_key,))
+
+    def close(self):
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._connection.close()
+
+
+def load_journal(config_file='config.ini'):
+    """
+    Abre la bitácora según la sección opcional [journal] del archivo INI.
+
+        [journal]
+        enabled = true
+        path = .cache/run_journal.db
+
+    :return: RunJournal, o None si la bitácora está desactivada.
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    if not config.getboolean('journal', 'enabled', fallback=True):
+        return None
+    return RunJournal(config.get('journal', 'path', fallback='.cache/run_journal.db'))
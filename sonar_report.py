@@ -0,0 +1,229 @@
+import configparser
+import html
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+import requests
+from http_client import get_session
+from utils import generate_random_folder_name
+
+# Medidas que se adjuntan como evidencia, en el orden en que se muestran
+METRIC_LABELS = {
+    "coverage": "Cobertura (%)",
+    "bugs": "Bugs",
+    "vulnerabilities": "Vulnerabilidades",
+    "security_hotspots": "Security hotspots",
+    "code_smells": "Code smells",
+    "duplicated_lines_density": "Duplicación (%)",
+    "ncloc": "Líneas de código"
+}
+
+STATUS_LABELS = {
+    "OK": "Aprobado",
+    "WARN": "Advertencia",
+    "ERROR": "Rechazado",
+    "NONE": "Sin quality gate"
+}
+
+STATUS_COLORS = {
+    "OK": (0, 170, 0),
+    "WARN": (237, 125, 32),
+    "ERROR": (212, 51, 63),
+    "NONE": (128, 128, 128)
+}
+
+
+def load_sonar_settings(config_file='config.ini'):
+    """
+    Lee la sección opcional [sonar] del archivo INI.
+
+        [sonar]
+        token = squ_xxx
+        evidence = report        ; screenshot (por defecto) o report
+        report_format = png      ; png, html o md
+
+    :return: (token, evidence, report_format)
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    token = config.get('sonar', 'token', fallback=None)
+    evidence = config.get('sonar', 'evidence', fallback='screenshot')
+    report_format = config.get('sonar', 'report_format', fallback='png')
+    return token, evidence, report_format
+
+
+def parse_dashboard_url(dashboard_url):
+    """
+    Obtiene la URL base de la API, el proyecto y la rama (o pull request) de una URL de dashboard,
+    por ejemplo http://sonar.afphabitat.net:9000/dashboard?id=proyecto&branch=feature-x.
+
+    :return: (api_base, project_key, params_rama)
+    """
+    parsed = urlparse(dashboard_url)
+    query = parse_qs(parsed.query)
+    api_base = f"{parsed.scheme}://{parsed.netloc}"
+    project_key = query.get('id', [None])[0]
+    branch_params = {}
+    if 'branch' in query:
+        branch_params['branch'] = query['branch'][0]
+    elif 'pullRequest' in query:
+        branch_params['pullRequest'] = query['pullRequest'][0]
+    return api_base, project_key, branch_params
+
+
+def fetch_project_report(dashboard_url, session=None):
+    """
+    Consulta el estado del quality gate y las medidas principales de un proyecto en Sonar.
+
+    :param dashboard_url: URL del dashboard encontrada en el log del build.
+    :return: Diccionario con project, branch, status, conditions y measures.
+    """
+    session = session or get_session('sonar')
+    api_base, project_key, branch_params = parse_dashboard_url(dashboard_url)
+    if not project_key:
+        raise ValueError(f"La URL {dashboard_url} no indica el proyecto (parámetro id)")
+
+    response = session.get(
+        f"{api_base}/api/qualitygates/project_status",
+        params=dict(branch_params, projectKey=project_key)
+    )
+    response.raise_for_status()
+    project_status = response.json().get('projectStatus', {})
+
+    response = session.get(
+        f"{api_base}/api/measures/component",
+        params=dict(branch_params, component=project_key, metricKeys=','.join(METRIC_LABELS))
+    )
+    response.raise_for_status()
+    measures = {measure['metric']: measure.get('value', '-')
+                for measure in response.json().get('component', {}).get('measures', [])}
+
+    return {
+        'dashboard_url': dashboard_url,
+        'project': project_key,
+        'branch': branch_params.get('branch') or branch_params.get('pullRequest') or '',
+        'status': project_status.get('status', 'NONE'),
+        'conditions': project_status.get('conditions', []),
+        'measures': measures
+    }
+
+
+def _title(report):
+    branch = f" ({report['branch']})" if report['branch'] else ''
+    return f"{report['project']}{branch}"
+
+
+def render_markdown(report):
+    """Genera el reporte de un proyecto en Markdown."""
+    lines = [
+        f"## Sonar: {_title(report)}",
+        "",
+        f"**Quality gate:** {STATUS_LABELS.get(report['status'], report['status'])}",
+        "",
+        "| Medida | Valor |",
+        "|---|---|"
+    ]
+    for metric, label in METRIC_LABELS.items():
+        lines.append(f"| {label} | {report['measures'].get(metric, '-')} |")
+    failed = [condition for condition in report['conditions'] if condition.get('status') == 'ERROR']
+    if failed:
+        lines.append("")
+        lines.append("**Condiciones no cumplidas:**")
+        for condition in failed:
+            lines.append(f"- {condition.get('metricKey')}: {condition.get('actualValue')} "
+                         f"(umbral {condition.get('comparator')} {condition.get('errorThreshold')})")
+    lines.append("")
+    lines.append(f"[Ver dashboard]({report['dashboard_url']})")
+    return '\n'.join(lines) + '\n'
+
+
+def render_html(report):
+    """Genera el reporte de un proyecto como página HTML autocontenida."""
+    color = 'rgb(%d,%d,%d)' % STATUS_COLORS.get(report['status'], STATUS_COLORS['NONE'])
+    rows = ''.join(
+        f"<tr><td>{html.escape(label)}</td><td>{html.escape(str(report['measures'].get(metric, '-')))}</td></tr>"
+        for metric, label in METRIC_LABELS.items()
+    )
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>Sonar {html.escape(_title(report))}</title></head>"
+        "<body style='font-family:sans-serif'>"
+        f"<h2>Sonar: {html.escape(_title(report))}</h2>"
+        f"<p>Quality gate: <b style='color:{color}'>"
+        f"{html.escape(STATUS_LABELS.get(report['status'], report['status']))}</b></p>"
+        f"<table border='1' cellpadding='4' cellspacing='0'>{rows}</table>"
+        f"<p><a href='{html.escape(report['dashboard_url'])}'>Ver dashboard</a></p>"
+        "</body></html>"
+    )
+
+
+def render_png(report, path):
+    """
+    Dibuja el reporte de un proyecto como imagen PNG (requiere Pillow).
+
+    :param path: Ruta del archivo PNG a generar.
+    """
+    from PIL import Image, ImageDraw
+
+    line_height = 22
+    lines = [(f"Sonar: {_title(report)}", (0, 0, 0))]
+    lines.append((f"Quality gate: {STATUS_LABELS.get(report['status'], report['status'])}",
+                  STATUS_COLORS.get(report['status'], STATUS_COLORS['NONE'])))
+    for metric, label in METRIC_LABELS.items():
+        lines.append((f"{label}: {report['measures'].get(metric, '-')}", (40, 40, 40)))
+    for condition in report['conditions']:
+        if condition.get('status') == 'ERROR':
+            lines.append((f"No cumple {condition.get('metricKey')}: {condition.get('actualValue')} "
+                          f"({condition.get('comparator')} {condition.get('errorThreshold')})", STATUS_COLORS['ERROR']))
+
+    image = Image.new('RGB', (640, 20 + line_height * len(lines)), 'white')
+    draw = ImageDraw.Draw(image)
+    for index, (text, color) in enumerate(lines):
+        draw.text((16, 10 + index * line_height), text, fill=color)
+    image.save(path, optimize=True)
+
+
+def build_sonar_reports(dashboard_urls, report_format='png', temp_dir=None, max_workers=8):
+    """
+    Genera un reporte por proyecto a partir de las URLs de dashboard, sin navegador.
+
+    :param dashboard_urls: URLs encontradas por get_sonar_urls.
+    :param report_format: 'png', 'html' o 'md'. Si Pillow no está instalado, 'png' pasa a 'html'.
+    :param temp_dir: Carpeta de destino; si es None se crea una temporal.
+    :return: Carpeta con los reportes, lista para upload_files_to_jira.
+    """
+    if temp_dir is None:
+        temp_dir = os.path.join(tempfile.gettempdir(), generate_random_folder_name())
+    os.makedirs(temp_dir, exist_ok=True)
+
+    if report_format == 'png':
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            print("Pillow no está instalado, los reportes Sonar se generan en HTML")
+            report_format = 'html'
+
+    def build(indexed_url):
+        index, dashboard_url = indexed_url
+        try:
+            report = fetch_project_report(dashboard_url)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Error al consultar Sonar para {dashboard_url}: {e}")
+            return None
+
+        file_name = f"sonar_{index:02d}_{report['project']}.{report_format}".replace('/', '_').replace(':', '_')
+        path = os.path.join(temp_dir, file_name)
+        if report_format == 'png':
+            render_png(report, path)
+        else:
+            content = render_html(report) if report_format == 'html' else render_markdown(report)
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(content)
+        print(f"Reporte Sonar de {_title(report)} ({report['status']}) guardado en: {path}")
+        return path
+
+    if dashboard_urls:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(dashboard_urls))) as executor:
+            list(executor.map(build, enumerate(dashboard_urls)))
+    return temp_dir
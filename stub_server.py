@@ -0,0 +1,102 @@
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Manejador HTTP/1.1 (keep-alive) que responde según las rutas registradas en el servidor.
+
+    Cada ruta se registra como (método, path) -> función(handler) que devuelve
+    (status, content_type, body). El path se compara sin query string.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        # Encabezados y cuerpo se escriben por separado; sin TCP_NODELAY el ACK
+        # retardado añade ~40 ms a cada respuesta sobre una conexión keep-alive.
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def _dispatch(self, method):
+        path = self.path.split('?', 1)[0]
+        route = self.server.routes.get((method, path)) or self.server.routes.get((method, '*'))
+
+        length = int(self.headers.get('Content-Length') or 0)
+        self.body = self.rfile.read(length) if length else b''
+
+        if route is None:
+            status, content_type, body = 404, 'text/plain', b'not found'
+        else:
+            status, content_type, body = route(self)
+
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def log_message(self, format, *args):
+        # Silenciar el log por petición para no distorsionar las mediciones
+        pass
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # El cliente puede cortar la descarga a mitad (lecturas en streaming con corte temprano)
+        if isinstance(sys.exc_info()[1], (ConnectionResetError, BrokenPipeError)):
+            return
+        super().handle_error(request, client_address)
+
+
+class StubServer:
+    """
+    Servidor HTTP local para pruebas y benchmarks contra Jira, Bitbucket, Bamboo o Sonar simulados.
+
+    Uso:
+        with StubServer({('GET', '/ping'): lambda h: (200, 'text/plain', 'pong')}) as server:
+            requests.get(f"{server.url}/ping")
+    """
+
+    def __init__(self, routes=None, host='127.0.0.1', port=0):
+        self.httpd = _StubHTTPServer((host, port), StubHandler)
+        self.httpd.routes = dict(routes or {})
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def add_route(self, method, path, handler):
+        self.httpd.routes[(method, path)] = handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
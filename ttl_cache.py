@@ -0,0 +1,100 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Caché clave -> valor con expiración (TTL) y tamaño máximo (se descarta la entrada menos usada).
+
+    Las entradas se mantienen en memoria durante la ejecución y, si se indica un archivo,
+    se persisten en disco en JSON para reutilizarlas en ejecuciones posteriores.
+    Es segura para usarse desde varios hilos.
+    """
+
+    def __init__(self, path=None, ttl=7 * 24 * 3600, max_entries=1000):
+        """
+        :param path: Archivo JSON donde persistir la caché, o None para solo memoria.
+        :param ttl: Segundos que una entrada se considera válida.
+        :param max_entries: Número máximo de entradas antes de descartar las menos usadas.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # clave -> (valor, expira_en)
+        self._lock = threading.Lock()
+        self._loaded = False
+
+    def _load(self):
+        """Carga las entradas vigentes desde disco la primera vez que se usa la caché."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except (OSError, ValueError) as err:
+            print(f"No se pudo leer la caché {self.path}: {err}")
+            return
+
+        now = time.time()
+        for key, (value, expires_at) in data.items():
+            if expires_at > now:
+                self._entries[key] = (value, expires_at)
+        self._evict()
+
+    def _save(self):
+        """Escribe la caché en disco de forma atómica (archivo temporal + reemplazo)."""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                json.dump(dict(self._entries), file)
+            os.replace(temp_path, self.path)
+        except OSError as err:
+            print(f"No se pudo guardar la caché {self.path}: {err}")
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key, default=None):
+        """Devuelve el valor vigente de la clave, o default si no existe o expiró."""
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Guarda un valor con el TTL de la caché y lo persiste en disco."""
+        with self._lock:
+            self._load()
+            self._entries[key] = (value, time.time() + self.ttl)
+            self._entries.move_to_end(key)
+            self._evict()
+            self._save()
+
+    def invalidate(self, key=None):
+        """Elimina una clave, o toda la caché si no se indica ninguna."""
+        with self._lock:
+            self._load()
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self._save()
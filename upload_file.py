@@ -1,63 +1,240 @@
+import mimetypes
 import os
+import time
+import uuid
 import requests
-from requests.auth import HTTPBasicAuth
+from concurrent.futures import ThreadPoolExecutor
+from http_client import get_session
 
-def upload_files_to_jira(jira_url, jira_issue_key, username, api_token, folder_path):
+
+class MultipartFileStream:
+    """
+    Cuerpo multipart/form-data que se lee de disco a medida que se envía.
+
+    Tiene tamaño conocido (Content-Length) y se entrega por bloques con read(), así que
+    subir varios archivos en una sola petición no los carga completos en memoria.
+    """
+
+    def __init__(self, file_paths, field_name='file'):
+        """
+        :param file_paths: Rutas de los archivos a incluir en el cuerpo.
+        :param field_name: Nombre del campo multipart de cada archivo.
+        """
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        # Partes: bytes fijos (encabezados) o rutas de archivo que se leen al enviar
+        self._parts = []
+        for file_path in file_paths:
+            file_name = os.path.basename(file_path)
+            mime_type = mimetypes.guess_type(file_name)[0] or 'application/octet-stream'
+            header = (
+                f"--{self.boundary}\r\n"
+                f'Content-Disposition: form-data; name="{field_name}"; filename="{file_name}"\r\n'
+                f"Content-Type: {mime_type}\r\n\r\n"
+            ).encode('utf-8')
+            self._parts.extend([header, file_path, b"\r\n"])
+        self._parts.append(f"--{self.boundary}--\r\n".encode('utf-8'))
+        self.len = sum(len(part) if isinstance(part, bytes) else os.path.getsize(part) for part in self._parts)
+        self._index = 0
+        self._current = None
+
+    def __len__(self):
+        return self.len
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.len
+        chunks = []
+        while size > 0 and self._index < len(self._parts):
+            if self._current is None:
+                part = self._parts[self._index]
+                self._current = open(part, 'rb') if isinstance(part, str) else _BytesReader(part)
+            chunk = self._current.read(size)
+            if not chunk:
+                self._current.close()
+                self._current = None
+                self._index += 1
+                continue
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b''.join(chunks)
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+
+
+class _BytesReader:
+    def __init__(self, data):
+        self._data = data
+        self._position = 0
+
+    def read(self, size):
+        chunk = self._data[self._position:self._position + size]
+        self._position += len(chunk)
+        return chunk
+
+    def close(self):
+        pass
+
+
+def _post_attachments(session, api_endpoint, file_paths):
+    """Sube uno o varios archivos en una sola petición multipart. Devuelve la respuesta."""
+    body = MultipartFileStream(file_paths)
+    headers = {
+        "X-Atlassian-Token": "no-check",  # Se requiere este encabezado para subir archivos
+        "Content-Type": body.content_type
+    }
+    try:
+        return session.post(api_endpoint, headers=headers, data=body)
+    finally:
+        body.close()
+
+
+def _list_attachments(session, issue_url):
+    """Adjuntos actuales del issue como diccionario id -> nombre, o None si no se pudieron consultar."""
+    try:
+        response = session.get(issue_url, headers={"Accept": "application/json"}, params={"fields": "attachment"})
+        response.raise_for_status()
+        attachments = response.json().get('fields', {}).get('attachment') or []
+        return {attachment['id']: attachment['filename'] for attachment in attachments}
+    except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+        print(f"No se pudieron consultar los adjuntos de {issue_url}: {e}")
+        return None
+
+
+def _not_attached(session, issue_url, file_paths, known_ids):
+    """
+    Archivos que no quedaron adjuntados tras una petición sin respuesta (por ejemplo, un
+    ReadTimeout después de que Jira ya aceptó el cuerpo).
+
+    :param known_ids: Ids de los adjuntos que existían antes de subir, o None si se desconocen.
+    :return: Rutas de los archivos que faltan, o None si no se pudo verificar.
+    """
+    attachments = _list_attachments(session, issue_url)
+    if attachments is None:
+        return None
+    new_names = {name for attachment_id, name in attachments.items() if known_ids is None or attachment_id not in known_ids}
+    return [file_path for file_path in file_paths if os.path.basename(file_path) not in new_names]
+
+
+def _upload_batch(session, issue_url, jira_issue_key, file_paths, retries, retry_delay, known_ids=None):
+    """
+    Sube un lote de archivos; si Jira rechaza el lote, reintenta cada archivo por separado.
+
+    Si una petición falla sin respuesta, Jira pudo haberla procesado igual: antes de
+    reintentar se consultan los adjuntos del issue y solo se reintentan los que faltan,
+    para no duplicar adjuntos.
+
+    :param issue_url: URL del issue en la API de Jira.
+    :param known_ids: Ids de los adjuntos que existían antes de subir (ver _list_attachments).
+    :return: Nombres de los archivos adjuntados.
+    """
+    api_endpoint = f"{issue_url}/attachments"
+    names = [os.path.basename(file_path) for file_path in file_paths]
+    print(f"Iniciando la subida de {len(names)} archivo(s): {', '.join(names)}")
+    pending = file_paths
+    try:
+        response = _post_attachments(session, api_endpoint, file_paths)
+        if response.status_code == 200 or response.status_code == 201:
+            print(f"Subida exitosa: {', '.join(names)} adjuntado(s) al issue {jira_issue_key}.")
+            return names
+        print(f"Error en la subida del lote {', '.join(names)}. Código de respuesta: {response.status_code}")
+        print(f"Detalles del error: {response.text}")
+    except requests.exceptions.RequestException as e:
+        print(f"Error durante la subida del lote {', '.join(names)}: {e}")
+        pending = _not_attached(session, issue_url, file_paths, known_ids)
+        if pending is None:
+            print(f"No se reintenta el lote {', '.join(names)} para no duplicar adjuntos.")
+            return []
+
+    # Reintento archivo por archivo para no perder los que sí pueden subirse
+    uploaded = [os.path.basename(file_path) for file_path in file_paths if file_path not in pending]
+    if uploaded:
+        print(f"Jira adjuntó {', '.join(uploaded)} pese al error del lote.")
+    for file_path in pending:
+        file_name = os.path.basename(file_path)
+        for attempt in range(1, retries + 1):
+            try:
+                response = _post_attachments(session, api_endpoint, [file_path])
+                if response.status_code == 200 or response.status_code == 201:
+                    print(f"Subida exitosa: {file_name} ha sido adjuntado al issue {jira_issue_key}.")
+                    uploaded.append(file_name)
+                    break
+                print(f"Error en la subida de {file_name} (intento {attempt}). Código de respuesta: {response.status_code}")
+            except requests.exceptions.RequestException as e:
+                print(f"Error durante la subida del archivo {file_name} (intento {attempt}): {e}")
+                missing = _not_attached(session, issue_url, [file_path], known_ids)
+                if missing is None:
+                    print(f"No se reintenta {file_name} para no duplicar adjuntos.")
+                    break
+                if not missing:
+                    print(f"Jira adjuntó {file_name} pese al error.")
+                    uploaded.append(file_name)
+                    break
+            # Sin espera después del último intento
+            if attempt < retries:
+                time.sleep(retry_delay * attempt)
+    return uploaded
+
+
+def upload_files_to_jira(jira_url, jira_issue_key, username, api_token, folder_path, batch_size=5, max_workers=3, retries=2, retry_delay=1, exclude=()):
     """
     Sube todos los archivos de una carpeta adjuntos a un issue en Jira.
 
+    Los archivos se envían en lotes de `batch_size` por petición multipart, los lotes se
+    suben en paralelo y el cuerpo se lee de disco a medida que se envía.
+
     :param jira_url: URL de la instancia de Jira (por ejemplo, https://tudominio.atlassian.net)
     :param jira_issue_key: Clave del issue en Jira (por ejemplo, "PROJ-123")
     :param username: Nombre de usuario para autenticarse en Jira
     :param api_token: API Token para autenticarse en Jira
     :param folder_path: Ruta completa de la carpeta que contiene los archivos a subir
-    :return: None
+    :param batch_size: Archivos por petición (1 = un archivo por petición)
+    :param max_workers: Lotes que se suben a la vez
+    :param retries: Reintentos por archivo cuando falla su lote
+    :param retry_delay: Segundos de espera base entre reintentos
+    :param exclude: Nombres de archivo que no se suben (por ejemplo, ya adjuntados antes)
+    :return: Lista con los nombres de los archivos adjuntados
     """
     # Verificar que la carpeta existe
-    if not os.path.exists(folder_path):
+    if not folder_path or not os.path.exists(folder_path):
         print(f"Error: La carpeta {folder_path} no existe.")
-        return
-    
+        return []
+
     # Listar todos los archivos en la carpeta
-    files_in_folder = [f for f in os.listdir(folder_path) if os.path.isfile(os.path.join(folder_path, f))]
-    
+    files_in_folder = sorted(f for f in os.listdir(folder_path) if os.path.isfile(os.path.join(folder_path, f)))
+
     # Verificar si hay archivos en la carpeta
     if not files_in_folder:
         print(f"No se encontraron archivos en la carpeta: {folder_path}")
-        return
-    
-    # Construir la URL de la API para subir archivos
-    api_endpoint = f"{jira_url}/issue/{jira_issue_key}/attachments"
-    
-    # Establecer los encabezados necesarios para la subida
-    headers = {
-        "X-Atlassian-Token": "no-check"  # Se requiere este encabezado para subir archivos
-    }
-    
-    # Autenticación básica usando el username y el API token
-    auth = HTTPBasicAuth(username, api_token)
-    
-    # Iterar sobre cada archivo en la carpeta y subirlo
-    for file_name in files_in_folder:
-        file_path = os.path.join(folder_path, file_name)
-        
-        # Leer el archivo en binario para la subida
-        with open(file_path, 'rb') as file:
-            files = {
-                'file': (file_name, file)
-            }
-            
-            print(f"Iniciando la subida del archivo: {file_path}")
-            
-            # Hacer la petición POST a la API de Jira
-            try:
-                response = requests.post(api_endpoint, headers=headers, auth=auth, files=files)
-                
-                # Validar el estado de la respuesta
-                if response.status_code == 200 or response.status_code == 201:
-                    print(f"Subida exitosa: {file_name} ha sido adjuntado al issue {jira_issue_key}.")
-                else:
-                    print(f"Error en la subida de {file_name}. Código de respuesta: {response.status_code}")
-                    print(f"Detalles del error: {response.text}")
-            except requests.exceptions.RequestException as e:
-                print(f"Error durante la subida del archivo {file_name}: {e}")
\ No newline at end of file
+        return []
+
+    files_in_folder = [f for f in files_in_folder if f not in exclude]
+    if not files_in_folder:
+        print(f"Todos los archivos de {folder_path} ya estaban adjuntados al issue {jira_issue_key}.")
+        return []
+
+    # URL del issue en la API; los archivos se suben a {issue_url}/attachments
+    issue_url = f"{jira_url}/issue/{jira_issue_key}"
+
+    # Sesión compartida de Jira con autenticación básica (username y API token)
+    session = get_session('jira', auth=(username, api_token))
+
+    # Adjuntos previos: tras un error sin respuesta permiten distinguir lo que subió esta ejecución
+    known_attachments = _list_attachments(session, issue_url)
+    known_ids = set(known_attachments) if known_attachments is not None else None
+
+    file_paths = [os.path.join(folder_path, file_name) for file_name in files_in_folder]
+    batch_size = max(1, batch_size)
+    batches = [file_paths[i:i + batch_size] for i in range(0, len(file_paths), batch_size)]
+
+    uploaded = []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(batches)))) as executor:
+        for batch_uploaded in executor.map(
+                lambda batch: _upload_batch(session, issue_url, jira_issue_key, batch, retries, retry_delay, known_ids), batches):
+            uploaded.extend(batch_uploaded)
+
+    print(f"{len(uploaded)} de {len(file_paths)} archivos adjuntados al issue {jira_issue_key} en {len(batches)} lote(s).")
+    return uploaded
@@ -4,17 +4,27 @@ import random
 import string
 import time
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.edge.service import Service
-from selenium.webdriver.edge.options import Options
 import tempfile
-import psutil
+
+# Selenium y psutil se importan dentro de las funciones que los usan: son pesados y solo
+# hacen falta en la etapa de capturas, no para trabajar con Jira o Bamboo.
+
+# Elementos del dashboard de Sonar que indican que la página terminó de dibujarse
+# (panel del quality gate y medidas en distintas versiones de SonarQube)
+SONAR_READY_SELECTORS = [
+    '[data-test="overview__quality-gate-panel"]',
+    '[data-testid="overview__quality-gate-panel"]',
+    '.overview-quality-gate',
+    '.overview-measures'
+]
 
 def kill_edge_processes():
     """
     Verifica si el proceso msedge.exe (Microsoft Edge) está en ejecución.
     Si está corriendo, lo termina.
     """
+    import psutil
+
     edge_process_name = "msedge.exe"
     edge_processes = []
     
@@ -43,7 +53,53 @@ def generate_random_folder_name(length=8):
     """Genera un nombre aleatorio para la carpeta."""
     return ''.join(random.choices(string.ascii_letters + string.digits, k=length))
 
-def capture_screenshots_with_cookies(edge_driver_path, edge_user_data_dir, edge_profile_directory, urls):
+# Script que devuelve, en una sola llamada, el estado de carga del documento, la cantidad de
+# recursos pedidos y si alguno de los selectores tiene un elemento visible
+PAGE_STATE_SCRIPT = """
+return [
+    document.readyState,
+    performance.getEntriesByType('resource').length,
+    arguments[0].some(function (selector) {
+        return Array.prototype.some.call(document.querySelectorAll(selector), function (element) {
+            return element.offsetWidth > 0 && element.offsetHeight > 0;
+        });
+    })
+];
+"""
+
+def wait_for_page_ready(driver, timeout=20, selectors=SONAR_READY_SELECTORS, idle_time=0.5, fallback_idle=2.0, poll_interval=0.1):
+    """
+    Espera a que el dashboard de Sonar esté listo para la captura.
+
+    Ambas condiciones se consultan en el mismo ciclo y comparten el plazo `timeout`:
+    la página está lista cuando aparece alguno de los elementos clave y la red lleva
+    `idle_time` segundos sin pedir recursos, o bien, si ningún selector coincide (otra
+    versión de Sonar), cuando la red lleva `fallback_idle` segundos inactiva.
+
+    :param timeout: Tiempo máximo de espera en segundos para la URL.
+    :param selectors: Selectores CSS de los elementos que indican que el dashboard cargó.
+    :param idle_time: Segundos sin recursos nuevos exigidos cuando un selector ya coincide.
+    :param fallback_idle: Segundos sin recursos nuevos exigidos cuando no coincide ninguno.
+    :return: True si la página quedó lista antes del timeout.
+    """
+    deadline = time.monotonic() + timeout
+    last_count = -1
+    stable_since = time.monotonic()
+    while True:
+        ready_state, count, element_visible = driver.execute_script(PAGE_STATE_SCRIPT, list(selectors))
+        now = time.monotonic()
+        if ready_state != 'complete' or count != last_count:
+            last_count = count
+            stable_since = now
+        else:
+            idle = now - stable_since
+            if idle >= (idle_time if element_visible else fallback_idle):
+                return True
+        if now >= deadline:
+            return False
+        time.sleep(poll_interval)
+
+def capture_screenshots_with_cookies(edge_driver_path, edge_user_data_dir, edge_profile_directory, urls, wait_mode='ready', timeout=20):
     """
     Abre cada URL en Microsoft Edge utilizando el perfil de usuario para cargar las cookies.
     Toma capturas de pantalla de las URLs después de iniciar sesión automáticamente mediante las cookies.
@@ -52,7 +108,14 @@ def capture_screenshots_with_cookies(edge_driver_path, edge_user_data_dir, edge_
     :param edge_user_data_dir: Ruta al directorio de datos del usuario de Edge.
     :param edge_profile_directory: Nombre del directorio del perfil de usuario en Edge.
     :param urls: Lista de URLs para abrir y capturar.
+    :param wait_mode: 'ready' espera a que el dashboard cargue (ver wait_for_page_ready);
+        'sleep' mantiene la espera fija de 10 segundos por URL.
+    :param timeout: Espera máxima por URL en segundos en el modo 'ready'.
     """
+    from selenium import webdriver
+    from selenium.webdriver.edge.service import Service
+    from selenium.webdriver.edge.options import Options
+
     # Directorio temporal para almacenar las capturas de pantalla
     temp_dir = os.path.join(tempfile.gettempdir(), generate_random_folder_name())
     os.makedirs(temp_dir, exist_ok=True)
@@ -70,22 +133,32 @@ def capture_screenshots_with_cookies(edge_driver_path, edge_user_data_dir, edge_
         print(f"Error al iniciar EdgeDriver: {e}")
         return
 
-    for url in urls:
+    render_times = []
+    for index, url in enumerate(urls):
+        start = time.monotonic()
         driver.get(url)
         print(f"Abriendo {url} con sesión existente")
         driver.maximize_window()
-        time.sleep(10)  # Esperar para que la página cargue completamente
-
+        if wait_mode == 'sleep':
+            time.sleep(10)  # Esperar para que la página cargue completamente
+        elif not wait_for_page_ready(driver, timeout):
+            print(f"La página {url} no terminó de cargar en {timeout} s, se captura de todas formas")
+        render_time = time.monotonic() - start
+        render_times.append(render_time)
+        print(f"Tiempo de carga de {url}: {render_time:.2f} s")
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        screenshot_filename = f"screenshot_{timestamp}.png"
+        # El índice evita que dos capturas del mismo segundo se sobrescriban
+        screenshot_filename = f"screenshot_{timestamp}_{index:02d}.png"
         screenshot_path = os.path.join(temp_dir, screenshot_filename)
 
         driver.save_screenshot(screenshot_path)
         print(f"Captura de pantalla guardada en: {screenshot_path}")
 
-        time.sleep(2)
+        if wait_mode == 'sleep':
+            time.sleep(2)
 
     driver.quit()
+    if render_times:
+        print(f"Tiempo total de carga: {sum(render_times):.2f} s para {len(render_times)} URLs")
     return temp_dir
-
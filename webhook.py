@@ -0,0 +1,286 @@
+import configparser
+import hashlib
+import hmac
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Forma general de una clave de issue. También calza con textos como UTF-8 o SHA-256, por
+# eso sin proyectos configurados solo se busca en el nombre de la rama
+ISSUE_KEY_PATTERN = re.compile(r'\b[A-Z][A-Z0-9]+-\d+\b')
+
+# Eventos de Jira que pueden dejar un issue listo para revisión
+JIRA_EVENTS = {'jira:issue_created', 'jira:issue_updated'}
+
+# Eventos de Bitbucket (encabezado X-Event-Key) de cambios en un pull request
+BITBUCKET_EVENTS = {'pullrequest:created', 'pullrequest:updated', 'pullrequest:fulfilled'}
+
+# Cambios de Jira que no justifican una nueva revisión: los adjuntos los sube el propio
+# pipeline, y reaccionar a ellos volvería a revisar el issue en un ciclo
+IGNORED_JIRA_FIELDS = {'Attachment'}
+
+
+def load_webhook_settings(config_file='config.ini'):
+    """
+    Lee la sección opcional [webhook] del archivo INI.
+
+        [webhook]
+        host = 127.0.0.1
+        port = 8090
+        debounce = 5      ; segundos sin eventos antes de procesar un issue
+        max_wait = 30     ; espera máxima aunque sigan llegando eventos
+        secret =          ; secreto compartido para validar X-Hub-Signature (opcional)
+        projects = QAT    ; claves de proyecto a buscar en los pull requests (opcional)
+
+    :return: Diccionario con los argumentos de WebhookListener.
+    """
+    config = configparser.ConfigParser()
+    config.read(config_file)
+    return {
+        'host': config.get('webhook', 'host', fallback='127.0.0.1'),
+        'port': config.getint('webhook', 'port', fallback=8090),
+        'debounce': config.getfloat('webhook', 'debounce', fallback=5),
+        'max_wait': config.getfloat('webhook', 'max_wait', fallback=30),
+        'secret': config.get('webhook', 'secret', fallback='') or None,
+        'projects': [project.strip().upper() for project in config.get('webhook', 'projects', fallback='').split(',')
+                     if project.strip()]
+    }
+
+
+def jira_issue_keys(payload, ignored_users=()):
+    """
+    Claves de issue afectadas por un webhook de Jira.
+
+    :param ignored_users: Correos o accountId cuyos cambios se ignoran (la cuenta del pipeline).
+    """
+    if payload.get('webhookEvent') not in JIRA_EVENTS:
+        return []
+    user = payload.get('user') or {}
+    if ignored_users and {user.get('emailAddress'), user.get('accountId'), user.get('name')} & set(ignored_users):
+        return []
+    items = (payload.get('changelog') or {}).get('items') or []
+    if items and all(item.get('field') in IGNORED_JIRA_FIELDS for item in items):
+        return []
+    key = (payload.get('issue') or {}).get('key')
+    return [key] if key else []
+
+
+def issue_key_pattern(projects):
+    """Expresión regular de las claves de issue de los proyectos indicados."""
+    return re.compile(r'\b(?:' + '|'.join(re.escape(project) for project in projects) + r')-\d+\b')
+
+
+def bitbucket_issue_keys(event, payload, projects=()):
+    """
+    Claves de issue mencionadas en un pull request.
+
+    :param projects: Claves de proyecto de Jira. Si se indican, se buscan en el título, la
+        rama origen y la descripción; si no, solo en el nombre de la rama origen.
+    """
+    if event not in BITBUCKET_EVENTS:
+        return []
+    pull_request = payload.get('pullrequest') or {}
+    branch = ((pull_request.get('source') or {}).get('branch') or {}).get('name') or ''
+    if projects:
+        pattern = issue_key_pattern(projects)
+        texts = [pull_request.get('title') or '', branch, pull_request.get('description') or '']
+    else:
+        pattern, texts = ISSUE_KEY_PATTERN, [branch]
+    keys = []
+    for text in texts:
+        for key in pattern.findall(text):
+            if key not in keys:
+                keys.append(key)
+    return keys
+
+
+class KeyDebouncer:
+    """
+    Agrupa eventos por clave y entrega las claves en lotes cuando dejan de llegar eventos.
+
+    Una clave se entrega cuando pasan `delay` segundos sin eventos nuevos para ella, o a
+    los `max_wait` segundos del primero aunque sigan llegando. Las claves listas al mismo
+    tiempo se entregan juntas en una sola llamada a `on_flush`, desde un único hilo;
+    los eventos que llegan mientras se procesa un lote quedan para el siguiente.
+    """
+
+    def __init__(self, on_flush, delay=5, max_wait=30):
+        """
+        :param on_flush: Función que recibe la lista de claves listas.
+        :param delay: Segundos de silencio antes de entregar una clave.
+        :param max_wait: Segundos máximos desde el primer evento de una clave.
+        """
+        self.on_flush = on_flush
+        self.delay = delay
+        self.max_wait = max(max_wait, delay)
+        self._pending = {}  # clave -> (primer_evento, ultimo_evento)
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def add(self, key):
+        now = time.monotonic()
+        with self._condition:
+            first, _ = self._pending.get(key, (now, now))
+            self._pending[key] = (first, now)
+            self._condition.notify()
+
+    def _due(self, now):
+        """
+        Claves listas y segundos hasta la próxima que lo estará.
+
+        Cuando alguna clave está lista se adelantan las que lo estarán dentro de medio
+        periodo de debounce, para que una ráfaga que toca varios issues se procese en un
+        solo lote en lugar de esperar lote tras lote.
+        """
+        due = {key: min(last + self.delay, first + self.max_wait) for key, (first, last) in self._pending.items()}
+        if not due:
+            return [], None
+        next_due = min(due.values())
+        if next_due > now:
+            return [], next_due - now
+        return [key for key, due_at in due.items() if due_at <= now + self.delay / 2], None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while True:
+                    if self._stopped:
+                        return
+                    ready, next_wait = self._due(time.monotonic())
+                    if ready:
+                        for key in ready:
+                            del self._pending[key]
+                        break
+                    self._condition.wait(next_wait)
+            try:
+                self.on_flush(ready)
+            except Exception as err:
+                print(f"Error procesando los issues {', '.join(ready)}: {err}")
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='webhook-debouncer', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """
+        Deja de entregar lotes y espera a que termine el que está en curso.
+
+        :param timeout: Segundos máximos de espera, o None para esperar sin límite.
+        :return: True si el hilo terminó.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+            return not self._thread.is_alive()
+        return True
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        listener = self.server.listener
+
+        if not listener.verify_signature(body, self.headers.get('X-Hub-Signature')):
+            self._respond(401, 'firma inválida')
+            return
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            self._respond(400, 'JSON inválido')
+            return
+
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if path == '/webhook/jira':
+            keys = jira_issue_keys(payload, listener.ignored_users)
+        elif path == '/webhook/bitbucket':
+            keys = bitbucket_issue_keys(self.headers.get('X-Event-Key'), payload, listener.projects)
+        else:
+            self._respond(404, 'ruta desconocida')
+            return
+
+        for key in keys:
+            listener.debouncer.add(key)
+        # Se responde de inmediato; la revisión ocurre después del debounce
+        self._respond(202, ','.join(keys))
+
+    def _respond(self, status, text):
+        body = text.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WebhookListener:
+    """
+    Servidor HTTP embebido que recibe webhooks de Jira (issue creado/actualizado) y de
+    Bitbucket (pull request creado/actualizado) y entrega las claves de issue afectadas,
+    agrupadas con KeyDebouncer, a la función `on_issues`.
+
+    Rutas:
+        POST /webhook/jira
+        POST /webhook/bitbucket   (tipo de evento en el encabezado X-Event-Key)
+    """
+
+    def __init__(self, on_issues, host='127.0.0.1', port=8090, debounce=5, max_wait=30, secret=None, ignored_users=(),
+                 projects=()):
+        """
+        :param on_issues: Función que recibe la lista de claves de issue a revisar.
+        :param host: Dirección de escucha.
+        :param port: Puerto de escucha (0 = uno libre).
+        :param debounce: Segundos sin eventos antes de revisar un issue.
+        :param max_wait: Espera máxima por issue aunque sigan llegando eventos.
+        :param secret: Secreto compartido para validar la firma X-Hub-Signature, o None.
+        :param ignored_users: Usuarios de Jira cuyos cambios no disparan revisiones.
+        :param projects: Claves de proyecto a buscar en los pull requests (ver bitbucket_issue_keys).
+        """
+        self.secret = secret
+        self.projects = tuple(projects)
+        self.ignored_users = tuple(user for user in ignored_users if user)
+        self.debouncer = KeyDebouncer(on_issues, delay=debounce, max_wait=max_wait)
+        self.httpd = ThreadingHTTPServer((host, port), _WebhookHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.listener = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def verify_signature(self, body, signature):
+        """Valida la firma HMAC-SHA256 ("sha256=<hex>") si hay un secreto configurado."""
+        if not self.secret:
+            return True
+        if not signature or not signature.startswith('sha256='):
+            return False
+        expected = hmac.new(self.secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+        return hmac.compare_digest(expected, signature[len('sha256='):])
+
+    def start(self):
+        self.debouncer.start()
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='webhook-listener', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """
+        Deja de recibir webhooks y espera a que termine el lote en curso.
+
+        :param timeout: Segundos máximos de espera por el lote en curso.
+        :return: True si el lote en curso terminó.
+        """
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        return self.debouncer.stop(timeout)